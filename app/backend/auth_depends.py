@@ -0,0 +1,173 @@
+import time
+from collections import OrderedDict
+from typing import Annotated
+
+import jwt
+from fastapi import Depends
+from fastapi.security import OAuth2PasswordBearer
+
+from app.backend.revocation import revocation_list
+from app.exceptions.exceptions import (
+    InvalidToken,
+    NoAccesToken,
+    TokenExpired,
+    TokenRevoked,
+    UserNotAutorized,
+)
+from app.settings.config import Settings
+
+SECRET_KEY = Settings.secret_key
+ALGORITHM = Settings.algorithm
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+
+
+class TokenCache:
+    """LRU-кеш уже проверенных JWT-токенов.
+
+    Запись живет не дольше поля exp самого токена, поэтому кеш
+    никогда не продлевает срок действия токена. Размер ограничен
+    max_size, при переполнении вытесняется самая старая запись.
+    """
+
+    def __init__(self, max_size: int = Settings.token_cache_size):
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[int, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> dict | None:
+        """Возвращает данные пользователя для токена или None"""
+
+        entry = self._items.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expire, user = entry
+        if expire <= time.time():
+            del self._items[token]
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def set(self, token: str, expire: int, user: dict):
+        """Сохраняет проверенный токен до момента его истечения"""
+
+        if self.max_size <= 0:
+            return
+        self._items[token] = (expire, user)
+        self._items.move_to_end(token)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._items.clear()
+
+    def metrics(self) -> dict:
+        """Счетчики попаданий и промахов кеша"""
+
+        total = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+token_cache = TokenCache()
+
+
+def decode_token(token: str) -> tuple[int, dict]:
+    """Проверяет подпись и поля JWT-токена.
+
+    Returns:
+        tuple: (exp, данные пользователя {"username", "id", "jti", "exp"})
+
+    Raises:
+        UserNotAutorized: невалидная подпись или отсутствует subject
+        NoAccesToken: отсутствует exp
+        InvalidToken: exp не является целым числом
+        TokenExpired: срок действия токена истек
+    """
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise TokenExpired()
+    except jwt.PyJWTError:
+        raise UserNotAutorized()
+
+    username: str | None = payload.get("sub")
+    user_id: int | None = payload.get("id")
+    expire: int | None = payload.get("exp")
+
+    if username is None:
+        raise UserNotAutorized()
+
+    if expire is None:
+        raise NoAccesToken()
+
+    if not isinstance(expire, int):
+        raise InvalidToken()
+
+    if expire < time.time():
+        raise TokenExpired()
+
+    return expire, {
+        "username": username,
+        "id": user_id,
+        "jti": payload.get("jti"),
+        "exp": expire,
+    }
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+    """Аутентифицирует пользователя по JWT-токену и возвращает его данные.
+
+    Повторные запросы с тем же токеном обслуживаются из token_cache
+    без повторной проверки подписи. Отзыв токена (и всех токенов
+    пользователя) проверяется всегда, но через фильтр Блума
+    revocation_list, без обращения к БД.
+
+    Args:
+        token (str): JWT-токен из заголовка Authorization (OAuth2 Bearer token).
+
+    Returns:
+        dict: Словарь с данными пользователя:
+            - username (str): Логин пользователя (subject из токена)
+            - id (int): ID пользователя
+            - jti (str | None): Идентификатор токена
+            - exp (int): Время истечения токена
+
+    Raises:
+        HTTPException: 401 UNAUTHORIZED - если:
+            - токен просрочен или отозван
+            - невалидный username/subject
+            - общая ошибка валидации токена
+        HTTPException: 400 BAD_REQUEST - если:
+            - отсутствует expire в токене
+            - некорректный формат токена
+    """
+
+    user = token_cache.get(token)
+    if user is None:
+        expire, user = decode_token(token)
+        token_cache.set(token, expire, user)
+
+    if user["jti"] is not None and await revocation_list.is_revoked(
+        user["jti"]
+    ):
+        raise TokenRevoked()
+    # Пользователь удален: его токены недействительны, даже без jti
+    if await revocation_list.is_user_revoked(user["id"]):
+        raise TokenRevoked()
+    return dict(user)
@@ -0,0 +1,269 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from app.backend.singleflight import get_flight
+from app.settings.config import Settings
+
+
+def json_body(value) -> bytes:
+    """Сериализует ответ обработчика так же, как FastAPI, но в байты"""
+
+    return json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+
+
+def json_response(body: bytes, **headers: str) -> Response:
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
+
+
+class CacheBackend(ABC):
+    """Базовый класс хранилища кеша ответов.
+
+    Значения - готовые JSON-байты; generation(namespace) - счетчик
+    поколения пространства ключей, bump() делает все его ключи
+    недостижимыми (для выдач, которые нельзя перечислить точно).
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float): ...
+
+    @abstractmethod
+    async def delete(self, *keys: str): ...
+
+    @abstractmethod
+    async def generation(self, namespace: str) -> int: ...
+
+    @abstractmethod
+    async def bump(self, namespace: str): ...
+
+
+class MemoryCache(CacheBackend):
+    """Кеш в памяти процесса: LRU с ограничением числа записей и TTL.
+
+    Инвалидация видна только этому процессу; при нескольких воркерах
+    устаревание у остальных ограничено TTL (или используйте Redis).
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self.evictions = 0
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def bump(self, namespace: str):
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """Кеш в Redis (или совместимом сервере): общий для всех воркеров.
+
+    Вытеснение по памяти - политика сервера (maxmemory-policy
+    allkeys-lru). Требует установленный пакет redis.
+    """
+
+    def __init__(self, url: str, prefix: str = "response_cache"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as error:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the 'redis' package"
+            ) from error
+
+        self._client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(f"{self.prefix}:{key}")
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self._client.set(
+            f"{self.prefix}:{key}", value, px=max(1, int(ttl * 1000))
+        )
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(
+                *(f"{self.prefix}:{key}" for key in keys)
+            )
+
+    async def generation(self, namespace: str) -> int:
+        value = await self._client.get(f"{self.prefix}:gen:{namespace}")
+        return int(value or 0)
+
+    async def bump(self, namespace: str):
+        await self._client.incr(f"{self.prefix}:gen:{namespace}")
+
+
+def make_cache_backend(name: str = Settings.cache_backend) -> CacheBackend:
+    """Создает хранилище по имени из настроек"""
+
+    if name == "redis":
+        return RedisCache(Settings.cache_redis_url)
+    return MemoryCache(Settings.cache_max_entries)
+
+
+class ResponseCache:
+    """Read-through кеш JSON-ответов GET-эндпоинтов.
+
+    Ключ - пространство (маршрут), его поколение и параметры запроса.
+    Хранятся уже сериализованные байты, поэтому попадание не трогает
+    ни БД, ни ORM, ни jsonable_encoder. Исключения не кешируются.
+
+    Запись хранит и версию (счетчик изменений таблицы), прочитанную
+    в той же сессии перед строками: запись другой версии считается
+    промахом, а ETag ответа строится по версии самого тела, поэтому
+    он никогда не новее данных, даже если инвалидация прошла мимо
+    этого процесса или строки читались с отстающей репликой.
+
+    Одновременные промахи по одному ключу склеиваются: load() выполнит
+    только первый запрос, остальные дождутся его результата.
+    """
+
+    def __init__(self, backend: CacheBackend | None = None):
+        self.backend = backend or make_cache_backend()
+        self.flight = get_flight("response_cache")
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(namespace: str, generation: int, params: dict) -> str:
+        raw = json.dumps(params, sort_keys=True, default=str)
+        return f"{namespace}:{generation}:{raw}"
+
+    async def cached(
+        self,
+        namespace: str,
+        params: dict,
+        load: Callable[[], Awaitable],
+        ttl: float = Settings.cache_ttl_seconds,
+        version: int | None = None,
+        target: str | None = None,
+        etag: Callable[[int], str] | None = None,
+    ) -> Response:
+        """Ответ из кеша или результат load(), сохраненный в кеш.
+
+        target - источник чтения (primary/реплика): склеиваются только
+        промахи с одинаковыми ключом, версией и источником. load()
+        должен открывать свою сессию (см. in_read_session).
+
+        С version load() возвращает пару (версия, значение), где версия
+        прочитана в той же сессии до строк (см. with_changes); попадание -
+        только запись ровно этой version. etag(версия тела) ставится
+        в заголовок ETag ответа.
+        """
+
+        generation = await self.backend.generation(namespace)
+        key = self.key(namespace, generation, params)
+        # "<version>\n<json>": в JSON без отступов нет перевода строки
+        stamp = b"" if version is None else str(version).encode()
+        entry = await self.backend.get(key)
+        if entry is not None:
+            stored, _, body = entry.partition(b"\n")
+            if stored == stamp:
+                self.hits += 1
+                return self._response(body, "HIT", version, etag)
+
+        self.misses += 1
+
+        async def fill() -> tuple[int | None, bytes]:
+            value = await load()
+            loaded = None
+            if version is not None:
+                loaded, value = value
+            body = json_body(value)
+            stored = b"" if loaded is None else str(loaded).encode()
+            await self.backend.set(key, stored + b"\n" + body, ttl)
+            return loaded, body
+
+        loaded, body = await self.flight.do((key, stamp, target), fill)
+        return self._response(body, "MISS", loaded, etag)
+
+    @staticmethod
+    def _response(
+        body: bytes,
+        status: str,
+        version: int | None,
+        etag: Callable[[int], str] | None,
+    ) -> Response:
+        headers = {"X-Cache": status}
+        if etag is not None and version is not None:
+            headers["ETag"] = etag(version)
+        return json_response(body, **headers)
+
+    async def invalidate(self, namespace: str, *params: dict):
+        """Удаляет точные ключи текущего поколения пространства"""
+
+        generation = await self.backend.generation(namespace)
+        await self.backend.delete(
+            *(self.key(namespace, generation, value) for value in params)
+        )
+        self.invalidations += len(params)
+
+    async def invalidate_all(self, *namespaces: str):
+        """Сбрасывает пространства целиком (страницы списков)"""
+
+        for namespace in namespaces:
+            await self.backend.bump(namespace)
+        self.invalidations += len(namespaces)
+
+    def metrics(self) -> dict:
+        total = self.hits + self.misses
+        metrics = {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+        if isinstance(self.backend, MemoryCache):
+            metrics["entries"] = self.backend.size()
+            metrics["evictions"] = self.backend.evictions
+        return metrics
+
+
+response_cache = ResponseCache()
+
+# Пространства ключей кешируемых эндпоинтов
+TASK_LIST = "task.list"
+TASK_TITLE = "task.title"
+USER_LIST = "user.list"
+USER_ID = "user.id"
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+BatchFn = Callable[[list], Awaitable[dict]]
+
+
+class DataLoader:
+    """Склеивает поиск по ключам внутри одного запроса в один SELECT.
+
+    Ключи, запрошенные через load() в одной итерации event loop,
+    копятся и уходят одним вызовом batch_fn(keys) -> {key: value}.
+    Повторный ключ не запрашивается: результат берется из кеша
+    загрузчика, который живет столько же, сколько сессия запроса,
+    или до первой записи в ней (см. clear_loaders).
+    """
+
+    def __init__(self, batch_fn: BatchFn, lock: asyncio.Lock):
+        self.batch_fn = batch_fn
+        # Общий для всех загрузчиков сессии: AsyncSession нельзя
+        # использовать из двух корутин одновременно
+        self._lock = lock
+        self._cache: dict[Hashable, asyncio.Future] = {}
+        self._queue: list[Hashable] = []
+        self.batches = 0
+        self.requested = 0
+
+    async def load(self, key: Hashable) -> Any:
+        self.requested += 1
+        future = self._cache.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._cache[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                # Ждем остальные load() этой итерации и грузим пачкой
+                asyncio.get_running_loop().call_soon(self._schedule)
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys) -> list:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _schedule(self):
+        asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        self.batches += 1
+        try:
+            async with self._lock:
+                values = await self.batch_fn(keys)
+        except Exception as error:
+            for key in keys:
+                # Ошибку не кешируем: следующий load() повторит запрос
+                future = self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(values.get(key))
+
+
+def get_loader(db, name: str, batch_fn: BatchFn) -> DataLoader:
+    """Загрузчик name, привязанный к сессии запроса (хранится в db.info)"""
+
+    loaders = db.info.setdefault("loaders", {})
+    loader = loaders.get(name)
+    if loader is None:
+        lock = db.info.setdefault("loaders_lock", asyncio.Lock())
+        loader = loaders[name] = DataLoader(batch_fn, lock)
+    return loader
+
+
+def clear_loaders(db):
+    """Сбрасывает загрузчики сессии после записи.
+
+    Иначе чтение той же строки после UPDATE/DELETE в этой сессии
+    вернуло бы ее прежнее состояние из кеша загрузчика. Уже
+    отправленные пачки дорешаются для тех, кто их ждет.
+    """
+
+    db.info.pop("loaders", None)
@@ -1,3 +1,5 @@
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -5,15 +7,76 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import DeclarativeBase
 
+from app.backend.pool_monitor import InstrumentedPool
+from app.backend.sql_monitor import sql_monitor
 from app.settings.config import Settings
 
-setting_db = f"postgresql+asyncpg://{Settings.database_user}:{Settings.database_password}@{Settings.database_host}:{Settings.database_port}/{Settings.database_name}"
 
-engine = create_async_engine(setting_db)
+def database_url(host: str, port: int | str) -> str:
+    """Строка подключения asyncpg к указанному серверу БД"""
+
+    return (
+        f"postgresql+asyncpg://{Settings.database_user}:"
+        f"{Settings.database_password}@{host}:{port}/{Settings.database_name}"
+    )
+
+
+def replica_url(replica: str) -> str:
+    """Строка подключения к реплике по записи вида host[:port]"""
+
+    host, _, port = replica.partition(":")
+    return database_url(host, port or Settings.database_port)
+
+
+setting_db = database_url(Settings.database_host, Settings.database_port)
+
+
+def engine_options() -> dict:
+    """Параметры пула соединений и драйвера asyncpg из настроек.
+
+    В режиме pgbouncer (transaction pooling) серверные prepared
+    statements нельзя переиспользовать между транзакциями, поэтому
+    кеши выражений отключаются, а имена выражений делаются уникальными.
+    """
+
+    connect_args = {
+        "statement_cache_size": Settings.database_statement_cache_size
+    }
+    options = {
+        "poolclass": InstrumentedPool,
+        "pool_size": Settings.database_pool_size,
+        "max_overflow": Settings.database_max_overflow,
+        "pool_timeout": Settings.database_pool_timeout,
+        "pool_recycle": Settings.database_pool_recycle,
+        "pool_pre_ping": Settings.database_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+    if Settings.database_pgbouncer:
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = (
+            lambda: f"__asyncpg_{uuid4()}__"
+        )
+    return options
+
+
+engine = create_async_engine(setting_db, **engine_options())
 async_session_maker = async_sessionmaker(
     engine, expire_on_commit=False, class_=AsyncSession
 )
 
+replica_engines = [
+    create_async_engine(replica_url(replica), **engine_options())
+    for replica in Settings.database_replica_hosts
+]
+for instrumented in (engine, *replica_engines):
+    sql_monitor.instrument(instrumented)
+
+replica_session_makers = [
+    async_sessionmaker(replica, expire_on_commit=False, class_=AsyncSession)
+    for replica in replica_engines
+]
+
 
 class Base(DeclarativeBase):
     pass
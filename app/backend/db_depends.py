@@ -1,10 +1,272 @@
-from typing import AsyncGenerator
+import itertools
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable
 
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db import async_session_maker
+from app.backend.db import async_session_maker, replica_session_makers
+from app.settings.config import Settings
 
+# Cookie, по которой клиент после своей записи читает с primary
+PRIMARY_COOKIE = "db_primary_until"
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
+
+class ReplicaRouter:
+    """Балансировка чтения по репликам (round-robin).
+
+    Реплика, к которой не удалось подключиться, исключается из
+    ротации на retry_seconds; если доступных реплик нет, чтение идет
+    на primary.
+    """
+
+    def __init__(self, session_makers, retry_seconds: float):
+        self.session_makers = session_makers
+        self.retry_seconds = retry_seconds
+        self._down_until = [0.0] * len(session_makers)
+        self._counter = itertools.count()
+        self.reads = [0] * len(session_makers)
+        self.failures = [0] * len(session_makers)
+        self.primary_reads = 0
+
+    def candidates(self) -> list[int]:
+        """Индексы доступных реплик, начиная со следующей по кругу"""
+
+        if not self.session_makers:
+            return []
+        now = time.monotonic()
+        start = next(self._counter) % len(self.session_makers)
+        order = (
+            list(range(start, len(self.session_makers)))
+            + list(range(start))
+        )
+        return [index for index in order if self._down_until[index] <= now]
+
+    def mark_down(self, index: int):
+        self.failures[index] += 1
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        return {
+            "primary_reads": self.primary_reads,
+            "replicas": [
+                {
+                    "host": host,
+                    "reads": self.reads[index],
+                    "failures": self.failures[index],
+                    "available": self._down_until[index] <= now,
+                }
+                for index, host in enumerate(Settings.database_replica_hosts)
+            ],
+        }
+
+
+replica_router = ReplicaRouter(
+    replica_session_makers, Settings.database_replica_retry_seconds
+)
+
+
+class LazySession:
+    """Прокси AsyncSession, который открывает сессию при первом запросе.
+
+    Зависимость объявляется до проверки токена, поэтому запрос,
+    отклоненный на аутентификации или валидации, не выбирает реплику,
+    не вешает обработчики событий и не берет соединение из пула.
+    Сама AsyncSession берет соединение на первом execute и отдает
+    его обратно в пул сразу после commit/rollback.
+    """
+
+    stats = {"declared": 0, "acquired": 0}
+
+    def __init__(self, factory: Callable[[], Awaitable[AsyncSession]]):
+        self._factory = factory
+        self._session: AsyncSession | None = None
+        self.info: dict = {}
+        LazySession.stats["declared"] += 1
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    async def _get(self) -> AsyncSession:
+        if self._session is None:
+            self._session = await self._factory()
+            LazySession.stats["acquired"] += 1
+        return self._session
+
+    async def execute(self, *args, **kwargs):
+        return await (await self._get()).execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await (await self._get()).scalar(*args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await (await self._get()).scalars(*args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        return await (await self._get()).stream(*args, **kwargs)
+
+    async def stream_scalars(self, *args, **kwargs):
+        return await (await self._get()).stream_scalars(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await (await self._get()).get(*args, **kwargs)
+
+    async def delete(self, instance):
+        return await (await self._get()).delete(instance)
+
+    async def flush(self, *args, **kwargs):
+        return await (await self._get()).flush(*args, **kwargs)
+
+    async def refresh(self, *args, **kwargs):
+        return await (await self._get()).refresh(*args, **kwargs)
+
+    async def connection(self, *args, **kwargs):
+        return await (await self._get()).connection(*args, **kwargs)
+
+    async def run_sync(self, *args, **kwargs):
+        return await (await self._get()).run_sync(*args, **kwargs)
+
+    async def commit(self):
+        if self._session is not None:
+            await self._session.commit()
+
+    async def rollback(self):
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    def __getattr__(self, name):
+        # Синхронные методы (add, expunge и т.д.) - только у начатой сессии
+        if self._session is None:
+            raise AttributeError(
+                f"{name!r} requires a started session, run a query first"
+            )
+        return getattr(self._session, name)
+
+
+def _track_writes(session: AsyncSession, response: Response):
+    """После коммита с записью ставит клиенту cookie "читать с primary".
+
+    Так реплика с отставанием репликации не вернет клиенту данные
+    старше его собственной записи (read-your-writes).
+    """
+
+    sync_session = session.sync_session
+
+    @event.listens_for(sync_session, "do_orm_execute")
+    def mark_statement(orm_execute_state):
+        if not orm_execute_state.is_select:
+            sync_session.info["has_writes"] = True
+
+    @event.listens_for(sync_session, "after_flush")
+    def mark_flush(flushed_session, flush_context):
+        sync_session.info["has_writes"] = True
+
+    @event.listens_for(sync_session, "after_commit")
+    def set_cookie(committed_session):
+        if not sync_session.info.pop("has_writes", False):
+            return
+        seconds = Settings.read_your_writes_seconds
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            str(int(time.time()) + seconds),
+            max_age=seconds,
+            httponly=True,
+        )
+
+
+def _reads_from_primary(request: Request) -> bool:
+    """Клиент недавно писал и должен читать свои изменения"""
+
+    try:
+        until = int(request.cookies.get(PRIMARY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+async def get_db(
+    response: Response,
+) -> AsyncGenerator[AsyncSession, None]:
+    async def open_session() -> AsyncSession:
+        session = async_session_maker()
+        _track_writes(session, response)
+        return session
+
+    session = LazySession(open_session)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def open_read_session(request: Request) -> AsyncSession:
+    """Открывает сессию на доступной реплике или на primary.
+
+    Если реплика не отвечает, она временно исключается из ротации,
+    а запрос уходит на следующую реплику или на primary.
+    """
+
+    if not _reads_from_primary(request):
+        for index in replica_router.candidates():
+            session = replica_router.session_makers[index]()
+            try:
+                await session.connection()
+            except (SQLAlchemyError, OSError):
+                await session.close()
+                replica_router.mark_down(index)
+                continue
+            replica_router.reads[index] += 1
+            return session
+
+    replica_router.primary_reads += 1
+    return async_session_maker()
+
+
+def read_target(request: Request) -> str:
+    """Куда уйдет чтение запроса: "primary" или "replica".
+
+    Входит в ключ склейки запросов: запрос с cookie read-your-writes
+    не должен получить результат, прочитанный с реплики.
+    """
+
+    if _reads_from_primary(request) or not replica_router.session_makers:
+        return "primary"
+    return "replica"
+
+
+def in_read_session(
+    request: Request, fn: Callable[[AsyncSession], Awaitable[Any]]
+) -> Callable[[], Awaitable[Any]]:
+    """load() для склеиваемого чтения: fn(session) в собственной сессии.
+
+    Результат ждут несколько запросов, поэтому сессия запроса-
+    инициатора не годится: ее закроет зависимость, если инициатор
+    отменится раньше остальных.
+    """
+
+    async def load():
+        session = await open_read_session(request)
+        async with session:
+            return await fn(session)
+
+    return load
+
+
+async def get_read_db(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Сессия для GET-запросов: реплика, если она есть и доступна"""
+
+    session = LazySession(lambda: open_read_session(request))
+    try:
         yield session
+    finally:
+        await session.close()
@@ -0,0 +1,73 @@
+from typing import Awaitable, Callable
+
+from fastapi import Response, status
+
+from app.exceptions.exceptions import PreconditionFailed
+
+
+def version_etag(version: int) -> str:
+    """Сильный ETag строки по ее версии"""
+
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: str | None) -> int | None:
+    """Версия из заголовка If-Match.
+
+    None - заголовка нет или он равен "*" (обновлять любую версию).
+    If-Match сравнивает ETag строго, поэтому слабый ETag (W/...),
+    список ETag и нечисловое значение отклоняются с 412.
+    """
+
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        raise PreconditionFailed()
+    value = value.strip('"')
+    if not value.isdigit():
+        raise PreconditionFailed()
+    return int(value)
+
+
+def changes_etag(table: str, changes: int) -> str:
+    """Слабый ETag ответа по счетчику изменений таблицы"""
+
+    return f'W/"{table}-{changes}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Совпадает ли ETag с If-None-Match (слабое сравнение, RFC 9110)"""
+
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        value.strip().removeprefix("W/") == opaque
+        for value in if_none_match.split(",")
+    )
+
+
+async def conditional_get(
+    if_none_match: str | None,
+    etag: str,
+    render: Callable[[], Awaitable[Response]],
+) -> Response:
+    """304 без тела, если у клиента актуальная версия, иначе render().
+
+    ETag для сравнения считается до чтения строк. Если render() сам
+    поставил ETag (по версии, прочитанной вместе с телом), остается
+    он: тег не может оказаться новее данных, даже когда тело читалось
+    в другой сессии или с другой реплики.
+    """
+
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    response = await render()
+    if "ETag" not in response.headers:
+        response.headers["ETag"] = etag
+    return response
@@ -0,0 +1,80 @@
+import base64
+import binascii
+import json
+from typing import Annotated, Callable
+
+from fastapi import Query
+from pydantic import BaseModel
+
+from app.exceptions.exceptions import InvalidCursor
+from app.settings.config import Settings
+
+
+def encode_cursor(**values) -> str:
+    """Упаковывает позицию в выдаче в непрозрачную строку для клиента"""
+
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Распаковывает курсор, полученный от клиента"""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor()
+    if not isinstance(values, dict):
+        raise InvalidCursor()
+    return values
+
+
+class PageParams(BaseModel):
+    """Параметры keyset-пагинации: размер страницы и позиция курсора"""
+
+    limit: int
+    after: dict | None = None
+
+    @property
+    def after_id(self) -> int:
+        """id последней записи предыдущей страницы (0 - с начала)"""
+
+        if not self.after:
+            return 0
+        try:
+            return int(self.after["id"])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursor()
+
+
+def get_page_params(
+    limit: Annotated[
+        int, Query(ge=1, le=Settings.page_max_limit)
+    ] = Settings.page_default_limit,
+    after: Annotated[
+        str | None, Query(description="next_cursor предыдущей страницы")
+    ] = None,
+) -> PageParams:
+    """Зависимость для списковых конечных точек"""
+
+    return PageParams(
+        limit=limit, after=decode_cursor(after) if after else None
+    )
+
+
+def make_page(
+    rows, page: PageParams, key: Callable = lambda row: {"id": row.id}
+) -> dict:
+    """Собирает страницу из limit + 1 строк.
+
+    Лишняя строка только сообщает, что дальше есть данные; курсор
+    указывает на последнюю отданную строку.
+    """
+
+    rows = list(rows)
+    items = rows[: page.limit]
+    next_cursor = None
+    if len(rows) > page.limit:
+        next_cursor = encode_cursor(**key(items[-1]))
+    return {"items": items, "next_cursor": next_cursor}
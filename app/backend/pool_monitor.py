@@ -0,0 +1,112 @@
+import time
+from collections import deque
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMonitor:
+    """Счетчики пула соединений: ожидание, переполнение, таймауты"""
+
+    def __init__(self, window: int = 1000):
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits = deque(maxlen=window)
+        self.started = time.monotonic()
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self._holds = deque(maxlen=window)
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self._waits.append(seconds)
+
+    def record_hold(self, seconds: float):
+        self.hold_total += seconds
+        self.hold_max = max(self.hold_max, seconds)
+        self._holds.append(seconds)
+
+    def _percentile(self, waits: list[float], fraction: float) -> float:
+        if not waits:
+            return 0.0
+        return waits[min(len(waits) - 1, int(len(waits) * fraction))]
+
+    def metrics(self) -> dict:
+        waits = sorted(self._waits)
+        holds = sorted(self._holds)
+        uptime = time.monotonic() - self.started
+        return {
+            "checkouts": self.checkouts,
+            "overflow_events": self.overflow_events,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "wait_avg_ms": (
+                self.wait_total / self.checkouts * 1000
+                if self.checkouts
+                else 0.0
+            ),
+            "wait_max_ms": self.wait_max * 1000,
+            "wait_p50_ms": self._percentile(waits, 0.5) * 1000,
+            "wait_p95_ms": self._percentile(waits, 0.95) * 1000,
+            "wait_p99_ms": self._percentile(waits, 0.99) * 1000,
+            # Сколько соединений в среднем занято (время удержания / аптайм)
+            "avg_occupancy": self.hold_total / uptime if uptime else 0.0,
+            "hold_max_ms": self.hold_max * 1000,
+            "hold_p50_ms": self._percentile(holds, 0.5) * 1000,
+            "hold_p95_ms": self._percentile(holds, 0.95) * 1000,
+        }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool, который измеряет время ожидания соединения.
+
+    Исчерпание пула под нагрузкой проявляется как рост wait_*_ms и
+    overflow_events, а не как необъяснимые всплески задержек.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.monitor = PoolMonitor()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.monitor.timeouts += 1
+            raise
+        self.monitor.record_wait(time.perf_counter() - start)
+        connection.info["checked_out_at"] = time.perf_counter()
+        return connection
+
+    def _do_return_conn(self, record):
+        checked_out_at = record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            self.monitor.record_hold(time.perf_counter() - checked_out_at)
+        super()._do_return_conn(record)
+
+    def _create_connection(self):
+        self.monitor.connects += 1
+        # _do_get уже увеличил счетчик: соединение сверх pool_size
+        if self._overflow > 0:
+            self.monitor.overflow_events += 1
+        return super()._create_connection()
+
+    def status_dict(self) -> dict:
+        """Текущее состояние пула вместе с накопленными счетчиками"""
+
+        return {
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            **self.monitor.metrics(),
+        }
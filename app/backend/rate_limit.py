@@ -0,0 +1,179 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Annotated
+
+from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.exceptions.exceptions import TooManyRequests
+from app.settings.config import Settings
+
+
+class RateLimitBackend(ABC):
+    """Базовый класс хранилища token-bucket.
+
+    take() атомарно списывает cost токенов из корзины key и
+    возвращает 0, если запрос разрешен, либо число секунд до
+    появления нужного количества токенов.
+    """
+
+    @abstractmethod
+    async def take(
+        self, key: str, rate: float, capacity: int, cost: int = 1
+    ) -> float: ...
+
+
+class MemoryBackend(RateLimitBackend):
+    """Token-bucket в памяти процесса, разбитый на шарды.
+
+    Каждый шард - отдельный OrderedDict со своей блокировкой, поэтому
+    конкурирующие потоки почти не ждут друг друга. Число корзин в
+    шарде ограничено: давно не использованные вытесняются.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100000):
+        self.shards = max(1, shards)
+        self.max_keys_per_shard = max(1, max_keys // self.shards)
+        self._buckets = [OrderedDict() for _ in range(self.shards)]
+        self._locks = [threading.Lock() for _ in range(self.shards)]
+
+    def take_sync(
+        self, key: str, rate: float, capacity: int, cost: int = 1
+    ) -> float:
+        index = hash(key) % self.shards
+        buckets = self._buckets[index]
+        now = time.monotonic()
+
+        with self._locks[index]:
+            tokens, updated = buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / rate
+
+            buckets[key] = (tokens, now)
+            buckets.move_to_end(key)
+            while len(buckets) > self.max_keys_per_shard:
+                buckets.popitem(last=False)
+
+        return retry_after
+
+    async def take(
+        self, key: str, rate: float, capacity: int, cost: int = 1
+    ) -> float:
+        return self.take_sync(key, rate, capacity, cost)
+
+
+class RedisBackend(RateLimitBackend):
+    """Token-bucket в Redis: общее состояние для нескольких воркеров.
+
+    Списание выполняется одним Lua-скриптом, то есть атомарно и за
+    один сетевой запрос. Требует установленный пакет redis.
+    """
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as error:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis requires the 'redis' package"
+            ) from error
+
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def take(
+        self, key: str, rate: float, capacity: int, cost: int = 1
+    ) -> float:
+        retry_after = await self._script(
+            keys=[f"rate_limit:{key}"],
+            args=[capacity, rate, cost, time.time()],
+        )
+        return float(retry_after)
+
+
+def make_backend(name: str = Settings.rate_limit_backend) -> RateLimitBackend:
+    """Создает хранилище по имени из настроек"""
+
+    if name == "redis":
+        return RedisBackend(Settings.rate_limit_redis_url)
+    return MemoryBackend()
+
+
+class LoginRateLimiter:
+    """Ограничение попыток логина по имени пользователя и по IP.
+
+    Обе корзины должны разрешить попытку; иначе запрос отклоняется
+    с 429 до обращения к БД и до проверки bcrypt.
+
+    Сначала списывается корзина IP, и только если она разрешила -
+    корзина пользователя: поток попыток с одного адреса упирается
+    в свой лимит и не выбирает лимит жертвы, блокируя ей вход.
+    """
+
+    def __init__(self, backend: RateLimitBackend | None = None):
+        self.backend = backend or make_backend()
+        self.allowed = 0
+        self.rejected = 0
+
+    async def check(self, username: str, client_ip: str):
+        retry_after = await self.backend.take(
+            f"login:ip:{client_ip}",
+            Settings.login_rate_per_minute_ip / 60,
+            Settings.login_burst_ip,
+        )
+        if retry_after == 0:
+            retry_after = await self.backend.take(
+                f"login:user:{username.strip().lower()}",
+                Settings.login_rate_per_minute_user / 60,
+                Settings.login_burst_user,
+            )
+        if retry_after > 0:
+            self.rejected += 1
+            raise TooManyRequests(retry_after)
+        self.allowed += 1
+
+    def metrics(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+login_rate_limiter = LoginRateLimiter()
+
+
+async def login_throttle(
+    request: Request,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+):
+    """Зависимость для /auth/token: отсекает лишние попытки входа"""
+
+    client_ip = request.client.host if request.client else "unknown"
+    await login_rate_limiter.check(form_data.username, client_ip)
@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import async_session_maker
+from app.models.revoked_token import RevokedToken
+from app.settings.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Фильтр Блума: отвечает "точно нет" или "возможно да".
+
+    Размер битового массива и число хеш-функций подбираются по
+    ожидаемому количеству элементов и допустимой доле ложных
+    срабатываний.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(
+            8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevocationList:
+    """Список отозванных JWT-токенов (по jti).
+
+    Источник истины - таблица revoked_token. Перед ней стоит фильтр
+    Блума в памяти процесса, поэтому проверка не отозванного токена
+    не обращается к БД. Фильтр догружается инкрементально не чаще
+    раза в refresh_seconds: перечитываются записи с revoked_at не
+    раньше последнего увиденного минус overlap_seconds. Водяной знак
+    по id здесь не годится - id выдаются до коммита, и запись,
+    закоммиченная позже записи с большим id, была бы пропущена.
+    Записи окна перекрытия помнятся в _recent, поэтому повторно
+    прочитанные не добавляются и не считаются дважды.
+
+    Когда записей становится больше емкости, фильтр перестраивается,
+    а записи об уже истекших токенах удаляются.
+
+    Перестроенный фильтр собирается целиком в стороне и подменяет
+    текущий одним присваиванием: пока идет загрузка, проверки работают
+    по старому фильтру и отозванные токены не пропускаются.
+    """
+
+    def __init__(
+        self,
+        capacity: int = Settings.revocation_bloom_capacity,
+        refresh_seconds: float = Settings.revocation_refresh_seconds,
+        overlap_seconds: float = Settings.revocation_overlap_seconds,
+    ):
+        self.capacity = capacity
+        self.refresh_seconds = refresh_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.bloom = BloomFilter(capacity)
+        # Самый поздний revoked_at среди прочитанных записей
+        self._last_seen: datetime | None = None
+        # jti -> revoked_at записей, которые еще попадут в окно догрузки
+        self._recent: dict[str, datetime] = {}
+        self._loaded_at = 0.0
+        self._refreshing: asyncio.Task | None = None
+        self._confirmed: set[str] = set()
+        # Отозванные этим процессом во время перестройки фильтра
+        self._revoked_during_rebuild: set[str] | None = None
+        self.checks = 0
+        self.db_checks = 0
+        self.false_positives = 0
+
+    async def refresh(self):
+        """Догружает в фильтр записи, появившиеся после прошлой загрузки"""
+
+        self._loaded_at = time.monotonic()
+        try:
+            async with async_session_maker() as session:
+                if self.bloom.count >= self.bloom.capacity:
+                    await self._rebuild(session)
+                    return
+                query = select(RevokedToken.jti, RevokedToken.revoked_at)
+                if self._last_seen is not None:
+                    query = query.where(
+                        RevokedToken.revoked_at
+                        >= self._last_seen - self.overlap
+                    )
+                rows = (await session.execute(query)).all()
+                for row in rows:
+                    self._remember(row.jti, row.revoked_at)
+                self._forget_old()
+        except (SQLAlchemyError, OSError) as error:
+            logger.warning("Revocation list refresh failed: %r", error)
+
+    def _remember(self, jti: str, revoked_at: datetime):
+        """Добавляет запись в фильтр, если ее там еще нет"""
+
+        if jti not in self._recent:
+            self.bloom.add(jti)
+        self._recent[jti] = revoked_at
+        if self._last_seen is None or revoked_at > self._last_seen:
+            self._last_seen = revoked_at
+
+    def _forget_old(self):
+        """Забывает записи, которые больше не попадут в окно догрузки"""
+
+        if self._last_seen is None:
+            return
+        horizon = self._last_seen - self.overlap
+        self._recent = {
+            jti: revoked_at
+            for jti, revoked_at in self._recent.items()
+            if revoked_at >= horizon
+        }
+
+    async def _rebuild(self, session: AsyncSession):
+        """Удаляет истекшие записи и пересобирает фильтр по оставшимся.
+
+        Размер нового фильтра - не меньше удвоенного числа живых
+        записей, иначе при множестве неистекших токенов перестройка
+        повторялась бы на каждой догрузке.
+        """
+
+        self._revoked_during_rebuild = set()
+        try:
+            await session.execute(
+                delete(RevokedToken).where(
+                    RevokedToken.expires_at < datetime.now(timezone.utc)
+                )
+            )
+            await session.commit()
+            rows = (
+                await session.execute(
+                    select(RevokedToken.jti, RevokedToken.revoked_at)
+                )
+            ).all()
+        finally:
+            revoked = self._revoked_during_rebuild
+            self._revoked_during_rebuild = None
+
+        # Дальше нет await: проверки видят либо старый фильтр, либо новый
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)))
+        confirmed = set(revoked)
+        recent = {jti: self._recent[jti] for jti in revoked}
+        for row in rows:
+            bloom.add(row.jti)
+            recent[row.jti] = row.revoked_at
+            if row.jti in self._confirmed:
+                confirmed.add(row.jti)
+        for jti in revoked.difference(row.jti for row in rows):
+            bloom.add(jti)
+        self.bloom, self._confirmed, self._recent = bloom, confirmed, recent
+        self._last_seen = max(recent.values(), default=None)
+        self._forget_old()
+
+    def _schedule_refresh(self):
+        """Запускает фоновую догрузку, если фильтр устарел"""
+
+        if time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+        if self._refreshing is not None and not self._refreshing.done():
+            return
+        self._refreshing = asyncio.create_task(self.refresh())
+
+    async def is_revoked(self, jti: str) -> bool:
+        """Проверяет, отозван ли токен.
+
+        Обычный случай (токен не отозван) обслуживается фильтром
+        без обращения к БД; в БД идут только возможные совпадения.
+        """
+
+        self.checks += 1
+        self._schedule_refresh()
+
+        if jti not in self.bloom:
+            return False
+        if jti in self._confirmed:
+            return True
+
+        self.db_checks += 1
+        async with async_session_maker() as session:
+            revoked = await session.scalar(
+                select(exists().where(RevokedToken.jti == jti))
+            )
+        if revoked:
+            self._confirmed.add(jti)
+        else:
+            self.false_positives += 1
+        return bool(revoked)
+
+    async def revoke(self, db: AsyncSession, jti: str, expire: int):
+        """Добавляет токен в список отозванных.
+
+        Локальный фильтр обновляется сразу, остальные процессы узнают
+        об отзыве при следующей догрузке. Коммит выполняет вызывающий код.
+        """
+
+        await db.execute(
+            insert(RevokedToken)
+            .values(
+                jti=jti,
+                expires_at=datetime.fromtimestamp(expire, timezone.utc),
+            )
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        # Точный revoked_at станет известен при догрузке; до тех пор
+        # запись держится в окне, чтобы догрузка не посчитала ее снова
+        if jti not in self._recent:
+            self.bloom.add(jti)
+        self._recent[jti] = datetime.now(timezone.utc)
+        self._confirmed.add(jti)
+        if self._revoked_during_rebuild is not None:
+            self._revoked_during_rebuild.add(jti)
+
+    @staticmethod
+    def user_marker(user_id: int) -> str:
+        """Запись об отзыве всех токенов пользователя (хранится как jti)"""
+
+        return f"user:{user_id}"
+
+    async def revoke_user(self, db: AsyncSession, user_id: int):
+        """Отзывает все access-токены пользователя, например при удалении.
+
+        Запись живет столько же, сколько самый долгий access-токен;
+        refresh-токены удаляются вместе с пользователем (ON DELETE
+        CASCADE). Коммит выполняет вызывающий код.
+        """
+
+        expire = time.time() + Settings.access_token_expire_minutes * 60
+        await self.revoke(db, self.user_marker(user_id), int(expire) + 1)
+
+    async def is_user_revoked(self, user_id: int | None) -> bool:
+        """Отозваны ли все токены пользователя (см. revoke_user)"""
+
+        if user_id is None:
+            return False
+        return await self.is_revoked(self.user_marker(user_id))
+
+    def metrics(self) -> dict:
+        return {
+            "bloom_size_bits": self.bloom.size,
+            "bloom_hashes": self.bloom.hashes,
+            "bloom_items": self.bloom.count,
+            "capacity": self.capacity,
+            "checks": self.checks,
+            "db_checks": self.db_checks,
+            "false_positives": self.false_positives,
+        }
+
+
+revocation_list = RevocationList()
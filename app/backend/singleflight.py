@@ -0,0 +1,64 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """Склеивает одинаковые одновременные вызовы в один.
+
+    Первый вызов do(key, fn) запускает fn(), остальные вызовы с тем же
+    ключом, пришедшие до его завершения, ждут тот же результат (или ту
+    же ошибку). Результат не запоминается: следующий вызов после
+    завершения снова выполнит fn() - это не кеш, а защита от
+    "стада" одинаковых запросов, например после истечения TTL.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        # Отмена одного ожидающего (клиент ушел) не отменяет вызов
+        # для остальных
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Ошибка уже передана ожидающим; если их не осталось,
+            # не даем asyncio ругаться на неполученное исключение
+            task.exception()
+
+    def metrics(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": (
+                self.coalesced / self.calls if self.calls else 0.0
+            ),
+            "in_flight": len(self._inflight),
+        }
+
+
+flights: dict[str, SingleFlight] = {}
+
+
+def get_flight(name: str) -> SingleFlight:
+    """Группа склейки name (у каждой группы свои метрики)"""
+
+    flight = flights.get(name)
+    if flight is None:
+        flight = flights[name] = SingleFlight()
+    return flight
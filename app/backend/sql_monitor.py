@@ -0,0 +1,166 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+
+from app.settings.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueryStats:
+    """Статистика SQL-запросов одного HTTP-запроса"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: str | None = None
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        self.shapes[statement] += 1
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        """Одинаковые по форме запросы, повторенные threshold и более раз"""
+
+        return [
+            (statement, count)
+            for statement, count in self.shapes.items()
+            if count >= threshold
+        ]
+
+
+query_stats: ContextVar[RequestQueryStats | None] = ContextVar(
+    "query_stats", default=None
+)
+
+
+class SQLMonitor:
+    """Счетчики SQL по всем запросам процесса"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.total_seconds = 0.0
+        self.slow_queries = 0
+        self.n_plus_one_requests = 0
+
+    def before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        self.queries += 1
+        self.total_seconds += elapsed
+
+        stats = query_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+        if elapsed * 1000 >= Settings.sql_slow_query_ms:
+            self.slow_queries += 1
+            logger.warning(
+                "Slow query %.1f ms%s: %s",
+                elapsed * 1000,
+                f" in {stats.method} {stats.path}" if stats else "",
+                statement,
+            )
+
+    def instrument(self, engine: AsyncEngine):
+        """Подписывается на события выполнения запросов движка"""
+
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            self.before_cursor_execute,
+        )
+        event.listen(
+            engine.sync_engine,
+            "after_cursor_execute",
+            self.after_cursor_execute,
+        )
+
+    def report(self, stats: RequestQueryStats):
+        """Итог по HTTP-запросу: лог и поиск вероятных N+1"""
+
+        self.requests += 1
+        repeated = stats.repeated_shapes(Settings.sql_n_plus_one_threshold)
+        if repeated:
+            self.n_plus_one_requests += 1
+            for statement, count in repeated:
+                logger.warning(
+                    "Probable N+1 in %s %s: %d x %s",
+                    stats.method,
+                    stats.path,
+                    count,
+                    statement,
+                )
+        logger.debug(
+            "%s %s: %d queries, %.1f ms total, slowest %.1f ms: %s",
+            stats.method,
+            stats.path,
+            stats.count,
+            stats.total * 1000,
+            stats.slowest * 1000,
+            stats.slowest_statement,
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "total_ms": self.total_seconds * 1000,
+            "slow_queries": self.slow_queries,
+            "n_plus_one_requests": self.n_plus_one_requests,
+        }
+
+
+sql_monitor = SQLMonitor()
+
+
+class SQLMonitorMiddleware:
+    """ASGI-middleware, собирающее статистику SQL по каждому запросу.
+
+    Добавляет в ответ заголовки X-DB-Query-Count и X-DB-Query-Time-Ms
+    (на момент начала ответа).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope["method"], scope["path"])
+        token = query_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Query-Time-Ms"] = f"{stats.total * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            query_stats.reset(token)
+            sql_monitor.report(stats)
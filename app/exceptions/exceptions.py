@@ -60,3 +60,46 @@ class IntegError(HTTPException):
 class NoUseTask(HTTPException):
     def __init__(self):
         super().__init__(detail='This item does not belong to you and you do not have access to it', status_code=404)
+
+class HashingOverloaded(HTTPException):
+    def __init__(self):
+        super().__init__(
+            detail='Server is busy, try again later', status_code=503
+        )
+
+class InvalidRefreshToken(HTTPException):
+    def __init__(self):
+        super().__init__(
+            detail='Invalid or expired refresh token', status_code=401
+        )
+
+class TokenRevoked(HTTPException):
+    def __init__(self):
+        super().__init__(detail='Token revoked!', status_code=401)
+
+class TooManyRequests(HTTPException):
+    def __init__(self, retry_after: float = 1):
+        super().__init__(
+            detail='Too many attempts, try again later',
+            status_code=429,
+            headers={'Retry-After': str(max(1, round(retry_after)))},
+        )
+
+class InvalidCursor(HTTPException):
+    def __init__(self):
+        super().__init__(detail='Invalid pagination cursor', status_code=400)
+
+class PreconditionFailed(HTTPException):
+    def __init__(self):
+        super().__init__(
+            detail='The record was modified by someone else, '
+            'reload it and retry',
+            status_code=412,
+        )
+
+class BulkConflict(HTTPException):
+    def __init__(self):
+        super().__init__(
+            detail='Row conflicted with a concurrent write, retry it',
+            status_code=409,
+        )
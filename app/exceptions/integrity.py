@@ -0,0 +1,50 @@
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+# Уникальные индексы по lower(...) и имя внешнего ключа Postgres по умолчанию
+USER_CONSTRAINTS = {
+    "ix_user_lower_name": "name",
+    "ix_user_lower_email": "email",
+}
+TASK_CONSTRAINTS = {
+    "ix_task_lower_title": "title",
+    "task_user_id_fkey": "user_id",
+}
+
+
+def constraint_name(error: IntegrityError) -> str | None:
+    """Имя нарушенного ограничения из исключения драйвера.
+
+    asyncpg отдает его в constraint_name; SQLAlchemy оборачивает
+    исключение драйвера, поэтому смотрим и orig, и его причину.
+    """
+
+    orig = getattr(error, "orig", None)
+    for candidate in (orig, getattr(orig, "__cause__", None)):
+        name = getattr(candidate, "constraint_name", None)
+        if name:
+            return name
+    return None
+
+
+def violated_field(error: IntegrityError, constraints: dict) -> str | None:
+    """Поле, ограничение которого нарушено, или None, если оно неизвестно"""
+
+    name = constraint_name(error)
+    if name is not None:
+        return constraints.get(name)
+    # Драйвер без constraint_name: ищем имя ограничения в тексте ошибки
+    message = str(error)
+    for constraint, field in constraints.items():
+        if constraint in message:
+            return field
+    return None
+
+
+def integrity_exception(
+    error: IntegrityError, errors: dict, default: type[HTTPException]
+) -> HTTPException:
+    """Переводит IntegrityError в исключение API по нарушенному полю"""
+
+    field = violated_field(error, {**USER_CONSTRAINTS, **TASK_CONSTRAINTS})
+    return errors.get(field, default)()
@@ -6,7 +6,9 @@ from re import search
 lists_classes = [NotFoundUser, DeleteUser, InvalidName, InvalidEmail, InvalidPasswd,
                  UserNotAutorized, NoAccesToken, InvalidToken, TokenExpired,
                  TaskNotFound, InvalidStatusTask, InvalidTitleTask, InvalidDescTask,
-                 IntegError, NoUseTask]
+                 IntegError, NoUseTask, HashingOverloaded,
+                 InvalidRefreshToken, TokenRevoked, TooManyRequests,
+                 InvalidCursor, PreconditionFailed, BulkConflict]
 
 def base_exception(func):
     @wraps(func)
@@ -1,8 +1,22 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from app.routers import auth, task, user
+from app.backend.revocation import revocation_list
+from app.backend.sql_monitor import SQLMonitorMiddleware
+from app.routers import auth, metrics, task, user
+from app.service.service_password import password_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await revocation_list.refresh()
+    yield
+    password_service.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(SQLMonitorMiddleware)
 
 
 @app.get("/")
@@ -13,3 +27,4 @@ async def welcome() -> dict:
 app.include_router(task.router)
 app.include_router(user.router)
 app.include_router(auth.router)
+app.include_router(metrics.router)
@@ -0,0 +1,75 @@
+"""Помощники для миграций, которые нельзя выполнять в транзакции.
+
+CREATE/DROP INDEX CONCURRENTLY строят индекс без блокировки записи
+в таблицу, но Postgres запрещает их внутри транзакции, поэтому они
+выполняются в autocommit_block: Alembic завершает текущую транзакцию,
+выполняет команду в autocommit и открывает новую.
+"""
+
+import sqlalchemy as sa
+from alembic import context, op
+
+
+def _drop_invalid_index(name: str):
+    """Удаляет индекс, оставшийся INVALID после прерванной сборки"""
+
+    if context.is_offline_mode():
+        return
+    invalid = op.get_bind().scalar(
+        sa.text(
+            "SELECT NOT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name"
+        ),
+        {"name": name},
+    )
+    if invalid:
+        op.execute(sa.text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+
+def index_is_valid(name: str) -> bool:
+    """Индекс существует и достроен (в offline-режиме - считаем, что да)"""
+
+    if context.is_offline_mode():
+        return True
+    return bool(
+        op.get_bind().scalar(
+            sa.text(
+                "SELECT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name"
+            ),
+            {"name": name},
+        )
+    )
+
+
+def create_index_concurrently(name: str, table: str, columns: list, **kw):
+    """op.create_index с CONCURRENTLY вне транзакции миграции.
+
+    Повторный запуск безопасен: недостроенный индекс пересоздается,
+    готовый пропускается.
+    """
+
+    with op.get_context().autocommit_block():
+        _drop_invalid_index(name)
+        op.create_index(
+            name,
+            table,
+            columns,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+            **kw,
+        )
+
+
+def drop_index_concurrently(name: str, table: str):
+    """op.drop_index с CONCURRENTLY вне транзакции миграции"""
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            name,
+            table_name=table,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,68 @@
+"""Add refresh_token
+
+Revision ID: 072412d844f5
+Revises: aa9d08491844
+Create Date: 2026-10-17 10:05:12.418230
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "072412d844f5"
+down_revision: Union[str, None] = "aa9d08491844"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "refresh_token",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("token_hash", sa.String(), nullable=False),
+        sa.Column("family_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "revoked",
+            sa.Boolean(),
+            server_default=sa.false(),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("token_hash"),
+    )
+    op.create_index(
+        op.f("ix_refresh_token_id"), "refresh_token", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_refresh_token_family_id"),
+        "refresh_token",
+        ["family_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_refresh_token_user_id"),
+        "refresh_token",
+        ["user_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_refresh_token_user_id"), table_name="refresh_token")
+    op.drop_index(
+        op.f("ix_refresh_token_family_id"), table_name="refresh_token"
+    )
+    op.drop_index(op.f("ix_refresh_token_id"), table_name="refresh_token")
+    op.drop_table("refresh_token")
@@ -0,0 +1,47 @@
+"""pg_trgm GIN indexes on lower(user.name) and lower(user.email)
+
+Revision ID: 1544107a4b6e
+Revises: eaf30a1a0ee3
+Create Date: 2026-10-17 17:20:36.905112
+
+CREATE EXTENSION требует прав владельца базы (или суперпользователя).
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.migrations.helpers import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "1544107a4b6e"
+down_revision: Union[str, None] = "eaf30a1a0ee3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    create_index_concurrently(
+        "ix_user_name_trgm",
+        "user",
+        [sa.text("lower(name) gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+    create_index_concurrently(
+        "ix_user_email_trgm",
+        "user",
+        [sa.text("lower(email) gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_user_email_trgm", "user")
+    drop_index_concurrently("ix_user_name_trgm", "user")
@@ -0,0 +1,32 @@
+"""Index revoked_token.revoked_at
+
+Revision ID: 3b9d0e5c7a21
+Revises: 769645126224
+Create Date: 2026-10-17 21:14:03.518274
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b9d0e5c7a21"
+down_revision: Union[str, None] = "769645126224"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_revoked_token_revoked_at"),
+        "revoked_token",
+        ["revoked_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_revoked_token_revoked_at"), table_name="revoked_token"
+    )
@@ -0,0 +1,89 @@
+"""Case-insensitive unique indexes on user.name, user.email, task.title
+
+Revision ID: 4f0d2c6cb16e
+Revises: fc069eb83adc
+Create Date: 2026-10-17 15:02:41.630518
+
+Индексы строятся CONCURRENTLY и не блокируют запись в user и task.
+Значения, которые отличаются только регистром, проверяются заранее:
+если они есть, миграция останавливается со списком примеров, и их
+нужно исправить вручную. Старые ограничения UNIQUE удаляются только
+после того, как новые индексы достроены.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+
+from app.migrations.helpers import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    index_is_valid,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "4f0d2c6cb16e"
+down_revision: Union[str, None] = "fc069eb83adc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (индекс, таблица, колонка, старое ограничение UNIQUE)
+INDEXES = [
+    ("ix_user_lower_name", "user", "name", "user_name_key"),
+    ("ix_user_lower_email", "user", "email", "user_email_key"),
+    ("ix_task_lower_title", "task", "title", "task_title_key"),
+]
+
+
+def _check_case_duplicates():
+    """Останавливает миграцию, если есть значения, равные без учета регистра"""
+
+    if context.is_offline_mode():
+        return
+    problems = []
+    for _, table, column, _ in INDEXES:
+        duplicates = (
+            op.get_bind()
+            .execute(
+                sa.text(
+                    f'SELECT lower("{column}") AS value, count(*) AS count '
+                    f'FROM "{table}" GROUP BY 1 HAVING count(*) > 1 '
+                    "ORDER BY 2 DESC LIMIT 5"
+                )
+            )
+            .all()
+        )
+        problems += [
+            f"{table}.{column}: {row.value!r} x{row.count}"
+            for row in duplicates
+        ]
+    if problems:
+        raise RuntimeError(
+            "Values differing only by case must be fixed before creating "
+            "case-insensitive unique indexes: " + "; ".join(problems)
+        )
+
+
+def upgrade() -> None:
+    _check_case_duplicates()
+    for name, table, column, _ in INDEXES:
+        create_index_concurrently(
+            name, table, [sa.text(f"lower({column})")], unique=True
+        )
+    for name, table, _, constraint in INDEXES:
+        if not index_is_valid(name):
+            raise RuntimeError(
+                f"index {name} is not valid, keeping {constraint}"
+            )
+        op.drop_constraint(constraint, table, type_="unique")
+
+
+def downgrade() -> None:
+    for name, table, column, constraint in reversed(INDEXES):
+        create_index_concurrently(constraint, table, [column], unique=True)
+        op.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{constraint}" '
+            f'UNIQUE USING INDEX "{constraint}"'
+        )
+        drop_index_concurrently(name, table)
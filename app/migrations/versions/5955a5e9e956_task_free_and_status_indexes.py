@@ -0,0 +1,41 @@
+"""Partial index for free tasks and task(status, id)
+
+Revision ID: 5955a5e9e956
+Revises: 4f0d2c6cb16e
+Create Date: 2026-10-17 15:31:09.284417
+
+Индексы строятся CONCURRENTLY и не блокируют запись в task.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.migrations.helpers import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "5955a5e9e956"
+down_revision: Union[str, None] = "4f0d2c6cb16e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        "ix_task_free_id",
+        "task",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("user_id IS NULL"),
+    )
+    create_index_concurrently(
+        "ix_task_status_id", "task", ["status", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_task_status_id", "task")
+    drop_index_concurrently("ix_task_free_id", "task")
@@ -0,0 +1,39 @@
+"""Add version column to task and user
+
+Revision ID: 6006b9321346
+Revises: 5955a5e9e956
+Create Date: 2026-10-17 16:12:54.771290
+
+Колонка с константным DEFAULT добавляется без перезаписи таблицы.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "6006b9321346"
+down_revision: Union[str, None] = "5955a5e9e956"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "task",
+        sa.Column(
+            "version", sa.Integer(), server_default="1", nullable=False
+        ),
+    )
+    op.add_column(
+        "user",
+        sa.Column(
+            "version", sa.Integer(), server_default="1", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user", "version")
+    op.drop_column("task", "version")
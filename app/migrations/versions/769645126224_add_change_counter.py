@@ -0,0 +1,40 @@
+"""Add change_counter
+
+Revision ID: 769645126224
+Revises: 1544107a4b6e
+Create Date: 2026-10-17 18:05:12.413920
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "769645126224"
+down_revision: Union[str, None] = "1544107a4b6e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    change_counter = op.create_table(
+        "change_counter",
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column(
+            "counter", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.PrimaryKeyConstraint("table_name"),
+    )
+    op.bulk_insert(
+        change_counter,
+        [
+            {"table_name": "task", "counter": 0},
+            {"table_name": "user", "counter": 0},
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("change_counter")
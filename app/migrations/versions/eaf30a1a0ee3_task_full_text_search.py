@@ -0,0 +1,54 @@
+"""Full-text search vector on task with a GIN index
+
+Revision ID: eaf30a1a0ee3
+Revises: 6006b9321346
+Create Date: 2026-10-17 16:48:20.513907
+
+Добавление STORED-колонки перезаписывает таблицу task под
+эксклюзивной блокировкой; индекс строится CONCURRENTLY.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from app.migrations.helpers import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "eaf30a1a0ee3"
+down_revision: Union[str, None] = "6006b9321346"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "task",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('simple', coalesce(title, '') "
+                "|| ' ' || coalesce(description, ''))",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    create_index_concurrently(
+        "ix_task_search_vector",
+        "task",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_task_search_vector", "task")
+    op.drop_column("task", "search_vector")
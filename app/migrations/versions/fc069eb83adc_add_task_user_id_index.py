@@ -0,0 +1,32 @@
+"""Add task.user_id index
+
+Revision ID: fc069eb83adc
+Revises: fddb86a06724
+Create Date: 2026-10-17 13:48:05.117342
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.migrations.helpers import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "fc069eb83adc"
+down_revision: Union[str, None] = "fddb86a06724"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        op.f("ix_task_user_id"), "task", ["user_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently(op.f("ix_task_user_id"), "task")
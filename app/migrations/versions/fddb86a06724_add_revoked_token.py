@@ -0,0 +1,52 @@
+"""Add revoked_token
+
+Revision ID: fddb86a06724
+Revises: 072412d844f5
+Create Date: 2026-10-17 11:32:47.902115
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "fddb86a06724"
+down_revision: Union[str, None] = "072412d844f5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_token",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("jti", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "revoked_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("jti"),
+    )
+    op.create_index(
+        op.f("ix_revoked_token_id"), "revoked_token", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_revoked_token_expires_at"),
+        "revoked_token",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_revoked_token_expires_at"), table_name="revoked_token"
+    )
+    op.drop_index(op.f("ix_revoked_token_id"), table_name="revoked_token")
+    op.drop_table("revoked_token")
@@ -1,2 +1,7 @@
+from .change_counter import ChangeCounter
+from .refresh_token import RefreshToken
+from .revoked_token import RevokedToken
 from .task import Task
 from .user import User
+
+__all__ = ["ChangeCounter", "RefreshToken", "RevokedToken", "Task", "User"]
@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Column, String
+
+from app.backend.db import Base
+
+
+class ChangeCounter(Base):
+    """Счетчик записей в таблицу: растет на каждой закоммиченной записи.
+
+    По нему строятся ETag списков и карточек, чтобы ответить 304
+    без чтения самих строк.
+    """
+
+    __tablename__ = "change_counter"
+    table_name = Column(String, primary_key=True)
+    counter = Column(BigInteger, nullable=False, server_default="0")
@@ -0,0 +1,30 @@
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    false,
+    func,
+)
+
+from app.backend.db import Base
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_token"
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String, unique=True, nullable=False)
+    family_id = Column(String, nullable=False, index=True)
+    user_id = Column(
+        Integer,
+        ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked = Column(Boolean, nullable=False, server_default=false())
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, DateTime, Integer, String, func
+
+from app.backend.db import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_token"
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, unique=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        index=True,
+    )
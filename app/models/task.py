@@ -1,17 +1,55 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column,
+    Computed,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.backend.db import Base
 
+# Конфигурация полнотекстового поиска: без стемминга, для любого языка
+SEARCH_CONFIG = "simple"
+
 
 class Task(Base):
     __tablename__ = "task"
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, unique=True)
+    title = Column(String)
     description = Column(String)
     status = Column(String)
+    # Оптимистическая блокировка: увеличивается при каждом UPDATE
+    version = Column(Integer, nullable=False, server_default="1")
     user_id = Column(
-        Integer, ForeignKey("user.id", ondelete="SET NULL"), nullable=True
+        Integer,
+        ForeignKey("user.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
+    # Лексемы title и description; считает сама БД, в ответы не попадает
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"to_tsvector('{SEARCH_CONFIG}', coalesce(title, '') "
+                "|| ' ' || coalesce(description, ''))",
+                persisted=True,
+            ),
+        )
+    )
+
+    __table_args__ = (
+        # Уникальность и поиск без учета регистра: ключ - lower(title)
+        Index("ix_task_lower_title", func.lower(title), unique=True),
+        # Задачи без владельца в порядке курсора (get_free_tasks)
+        Index("ix_task_free_id", id, postgresql_where=user_id.is_(None)),
+        # Фильтр по статусу с keyset-пагинацией по id
+        Index("ix_task_status_id", status, id),
+        Index("ix_task_search_vector", search_vector, postgresql_using="gin"),
     )
 
     user = relationship("User", back_populates="task")
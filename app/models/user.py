@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, func
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -7,9 +7,30 @@ from app.backend.db import Base
 class User(Base):
     __tablename__ = "user"
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True)
-    email = Column(String, unique=True)
+    name = Column(String)
+    email = Column(String)
     hashed_password = Column(String)
+    # Оптимистическая блокировка: увеличивается при каждом UPDATE
+    version = Column(Integer, nullable=False, server_default="1")
+
+    # Уникальность и поиск без учета регистра: ключ - lower(колонки)
+    __table_args__ = (
+        Index("ix_user_lower_name", func.lower(name), unique=True),
+        Index("ix_user_lower_email", func.lower(email), unique=True),
+        # Нечеткий поиск (pg_trgm) по тем же нормализованным ключам
+        Index(
+            "ix_user_name_trgm",
+            func.lower(name).label("lower_name"),
+            postgresql_using="gin",
+            postgresql_ops={"lower_name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_user_email_trgm",
+            func.lower(email).label("lower_email"),
+            postgresql_using="gin",
+            postgresql_ops={"lower_email": "gin_trgm_ops"},
+        ),
+    )
 
     task = relationship(
         "Task", back_populates="user", uselist=True, passive_deletes=True
@@ -1,15 +1,186 @@
-from sqlalchemy import select
+import json
+from typing import AsyncIterator, Awaitable, Callable
+
+from sqlalchemy import Integer, any_, exists, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.backend.dataloader import DataLoader, clear_loaders, get_loader
+from app.backend.pagination import PageParams, make_page
+from app.models.change_counter import ChangeCounter
+
 
 class BaseRepository:
-    """Базовый репозиторий, который содержит в себе все общие методы для роутов User и Task"""
+    """Базовый репозиторий, который содержит в себе все общие методы
+    для роутов User и Task"""
 
     model = None
+    # Колонки, которые попадают в выгрузку (None - все хранимые колонки)
+    export_columns = None
+
+    @classmethod
+    def stored_columns(cls) -> tuple:
+        """Колонки таблицы без вычисляемых БД (GENERATED ... STORED)"""
+
+        return tuple(
+            column
+            for column in cls.model.__table__.columns
+            if column.computed is None
+        )
+
+    @classmethod
+    async def bump_changes(cls, db: AsyncSession, *tables: str):
+        """Увеличивает счетчик изменений таблиц в транзакции записи.
+
+        Вызывается перед commit, поэтому счетчик растет ровно вместе
+        с закоммиченными строками. Без tables - таблица модели.
+        Заодно сбрасывает загрузчики сессии: их кеш устарел.
+        """
+
+        clear_loaders(db)
+
+        for table in tables or (cls.model.__tablename__,):
+            query = pg_insert(ChangeCounter).values(table_name=table, counter=1)
+            await db.execute(
+                query.on_conflict_do_update(
+                    index_elements=[ChangeCounter.table_name],
+                    set_={"counter": ChangeCounter.counter + 1},
+                )
+            )
+
+    @classmethod
+    async def changes_of(cls, db: AsyncSession, *tables: str) -> dict:
+        """Счетчики изменений нескольких таблиц одним запросом"""
+
+        rows = await db.execute(
+            select(ChangeCounter.table_name, ChangeCounter.counter).where(
+                ChangeCounter.table_name.in_(tables)
+            )
+        )
+        changes = dict.fromkeys(tables, 0)
+        changes.update(rows.tuples().all())
+        return changes
 
     @classmethod
-    async def get_all(cls, db: AsyncSession):
-        """Метод для получения всех записей с БД, общий для всех моделей"""
+    def with_changes(
+        cls, fn: Callable[[AsyncSession], Awaitable]
+    ) -> Callable[[AsyncSession], Awaitable[tuple]]:
+        """fn(session), которому предшествует чтение счетчика изменений.
+
+        Оба чтения идут в одной сессии, счетчик - первым, поэтому
+        строки не старше возвращенной версии: (версия, результат fn).
+        """
+
+        async def load(session: AsyncSession) -> tuple:
+            changes = await cls.get_changes(session)
+            return changes, await fn(session)
+
+        return load
+
+    @classmethod
+    async def get_changes(cls, db: AsyncSession) -> int:
+        """Текущее значение счетчика изменений таблицы модели"""
+
+        value = await db.scalar(
+            select(ChangeCounter.counter).where(
+                ChangeCounter.table_name == cls.model.__tablename__
+            )
+        )
+        return value or 0
+
+    @classmethod
+    def loader(
+        cls,
+        db: AsyncSession,
+        name: str,
+        key_expr,
+        key_type=Integer,
+        query=None,
+    ) -> DataLoader:
+        """DataLoader сессии запроса для поиска записей по ключу key_expr.
+
+        Все ключи пачки уходят одним запросом WHERE key = ANY(:keys) -
+        один параметр-массив вместо IN со списком. Ключи в ответе
+        сопоставляются по значению key_expr, выбранному тем же запросом.
+        """
+
+        query = query if query is not None else select(cls.model)
+
+        async def batch(keys: list) -> dict:
+            values = await db.execute(
+                query.add_columns(key_expr.label("loader_key")).where(
+                    key_expr == any_(literal(keys, ARRAY(key_type)))
+                )
+            )
+            return {row.loader_key: row[0] for row in values.all()}
+
+        return get_loader(db, f"{cls.model.__tablename__}.{name}", batch)
+
+    @classmethod
+    async def get_by_id(cls, db: AsyncSession, record_id: int):
+        """Метод для получения записи через ее ID (через DataLoader запроса)"""
+
+        return await cls.loader(db, "id", cls.model.id).load(record_id)
+
+    @classmethod
+    def paginate(cls, query, page: PageParams):
+        """Добавляет к запросу keyset-пагинацию по первичному ключу"""
+
+        query = query.order_by(cls.model.id).limit(page.limit + 1)
+        if page.after_id:
+            query = query.where(cls.model.id > page.after_id)
+        return query
+
+    @classmethod
+    async def get_all(cls, db: AsyncSession, page: PageParams):
+        """Метод для получения страницы записей с БД, общий для всех моделей"""
+
+        value = await db.scalars(cls.paginate(select(cls.model), page))
+        return make_page(value.all(), page)
+
+    @classmethod
+    async def exists_where(cls, db: AsyncSession, *conditions) -> bool:
+        """Метод для проверки существования записи по условию (SELECT EXISTS)"""
+
+        return await db.scalar(select(exists().where(*conditions)))
+
+    @classmethod
+    async def existing_ids(cls, db: AsyncSession, ids) -> set[int]:
+        """Метод для проверки существования набора ID одним запросом"""
+
+        if not ids:
+            return set()
+        values = await db.scalars(
+            select(cls.model.id).where(cls.model.id.in_(ids))
+        )
+        return set(values.all())
+
+    @classmethod
+    async def stream_ndjson(
+        cls,
+        open_session: Callable[[], Awaitable[AsyncSession]],
+        chunk_rows: int,
+    ) -> AsyncIterator[bytes]:
+        """Выгружает всю таблицу в NDJSON через серверный курсор.
+
+        Строки читаются пачками по chunk_rows и сразу отдаются клиенту,
+        поэтому память не растет с размером таблицы. Выбираются
+        колонки, а не ORM-объекты, чтобы не заполнять identity map.
+        Сессия открывается внутри генератора и живет ровно столько,
+        сколько идет выгрузка.
+        """
 
-        value = await db.scalars(select(cls.model))
-        return value.all()
+        columns = cls.export_columns or cls.stored_columns()
+        query = (
+            select(*columns)
+            .order_by(cls.model.id)
+            .execution_options(yield_per=chunk_rows)
+        )
+        session = await open_session()
+        async with session:
+            result = await session.stream(query)
+            async for rows in result.mappings().partitions():
+                yield "".join(
+                    json.dumps(dict(row), default=str) + "\n" for row in rows
+                ).encode()
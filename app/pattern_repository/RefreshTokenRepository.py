@@ -0,0 +1,101 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, update
+
+from app.backend.db_depends import AsyncSession
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.pattern_repository.BaseRepository import BaseRepository
+from app.settings.config import Settings
+
+
+class RefreshTokenRepository(BaseRepository):
+    """Класс для работы с refresh-токенами в БД,
+    наследник базового репозитория"""
+
+    model = RefreshToken
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        """Возвращает sha256 от токена: в БД хранится только хеш"""
+
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def expires_at() -> datetime:
+        """Момент истечения нового refresh-токена (скользящее окно)"""
+
+        return datetime.now(timezone.utc) + timedelta(
+            days=Settings.refresh_token_expire_days
+        )
+
+    @classmethod
+    async def add_token(
+        cls, db: AsyncSession, user_id: int, family_id: str | None = None
+    ) -> str:
+        """Добавляет новый refresh-токен в сессию и возвращает его значение.
+
+        family_id объединяет все токены, полученные ротацией из одного
+        логина. Коммит выполняет вызывающий код.
+        """
+
+        token = secrets.token_urlsafe(48)
+        await db.execute(
+            insert(RefreshToken).values(
+                token_hash=cls.hash_token(token),
+                family_id=family_id or secrets.token_hex(16),
+                user_id=user_id,
+                expires_at=cls.expires_at(),
+            )
+        )
+        return token
+
+    @classmethod
+    async def consume(cls, db: AsyncSession, token: str):
+        """Помечает действующий токен использованным за один запрос.
+
+        Returns:
+            Row | None: (user_id, family_id, name) или None, если токен
+            не найден, истек или уже был использован
+        """
+
+        result = await db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == cls.hash_token(token),
+                RefreshToken.revoked.is_(False),
+                RefreshToken.expires_at > datetime.now(timezone.utc),
+                RefreshToken.user_id == User.id,
+            )
+            .values(revoked=True)
+            .returning(RefreshToken.user_id, RefreshToken.family_id, User.name)
+        )
+        return result.first()
+
+    @classmethod
+    async def get_family(
+        cls, db: AsyncSession, token: str, user_id: int | None = None
+    ) -> str | None:
+        """Возвращает family_id токена (в том числе отозванного).
+
+        С user_id - только если токен принадлежит этому пользователю.
+        """
+
+        query = select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == cls.hash_token(token)
+        )
+        if user_id is not None:
+            query = query.where(RefreshToken.user_id == user_id)
+        return await db.scalar(query)
+
+    @classmethod
+    async def revoke_family(cls, db: AsyncSession, family_id: str):
+        """Отзывает все токены одной цепочки ротации"""
+
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id)
+            .values(revoked=True)
+        )
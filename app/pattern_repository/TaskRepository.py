@@ -1,7 +1,22 @@
-from sqlalchemy import insert, select, update
+import re
+
+from sqlalchemy import (
+    String,
+    and_,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
 
 from app.backend.db_depends import AsyncSession
-from app.models.task import Task
+from app.backend.pagination import PageParams, make_page
+from app.exceptions.exceptions import InvalidCursor
+from app.models.task import SEARCH_CONFIG, Task
 from app.pattern_repository.BaseRepository import BaseRepository
 from app.schemas import CreateTask
 
@@ -13,78 +28,252 @@ class TaskRepository(BaseRepository):
 
     model = Task
 
+    @classmethod
+    def title_is(cls, title: str):
+        """Условие поиска по названию через индекс ix_task_lower_title"""
+
+        return func.lower(Task.title) == title.lower()
+
     @classmethod
     async def create_task(cls, db: AsyncSession, createtask: CreateTask):
         """Метод для создания задачи"""
 
         await db.execute(
             insert(Task).values(
-                title=createtask.title,
+                title=createtask.title.capitalize(),
                 description=createtask.description,
                 status=createtask.status,
                 user_id=createtask.user_id,
             )
         )
+        await cls.bump_changes(db)
+        await db.commit()
+
+    @classmethod
+    async def taken_titles(cls, db: AsyncSession, titles) -> set[str]:
+        """Метод для проверки занятости набора названий одним запросом.
+
+        Возвращает занятые названия в нижнем регистре.
+        """
+
+        if not titles:
+            return set()
+        values = await db.scalars(
+            select(func.lower(Task.title)).where(
+                func.lower(Task.title).in_([title.lower() for title in titles])
+            )
+        )
+        return set(values.all())
+
+    @classmethod
+    async def create_tasks(
+        cls, db: AsyncSession, tasks: list[CreateTask]
+    ) -> set[str]:
+        """Метод для создания пачки задач одним многострочным INSERT.
+
+        Строки, занятые параллельной записью, пропускаются (ON CONFLICT
+        DO NOTHING); возвращаются названия записанных задач в нижнем
+        регистре.
+        """
+
+        values = await db.scalars(
+            pg_insert(Task)
+            .values(
+                [
+                    {
+                        "title": task.title.capitalize(),
+                        "description": task.description,
+                        "status": task.status,
+                        "user_id": task.user_id,
+                    }
+                    for task in tasks
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(func.lower(Task.title))
+        )
+        created = set(values.all())
+        if created:
+            await cls.bump_changes(db)
         await db.commit()
+        return created
 
     @classmethod
     async def update_by(
-        cls, db: AsyncSession, update_task: CreateTask, task_id: int
+        cls,
+        db: AsyncSession,
+        update_task: CreateTask,
+        task_id: int,
+        owner_id: int,
+        version: int | None = None,
     ):
-        """Метод для обновления задачи"""
+        """Метод для обновления задачи владельца.
 
-        await db.execute(
-            update(Task)
-            .where(Task.user_id == task_id)
-            .values(
+        Один UPDATE ... WHERE id AND user_id [AND version] RETURNING:
+        версия увеличивается, обновленная строка возвращается в том же
+        запросе. None - строка не подошла под условие.
+
+        Возвращает пару (задача, прежнее название): старое значение
+        берется из той же строки через UPDATE ... FROM task AS old.
+        """
+
+        old = aliased(Task)
+        query = update(Task).where(
+            Task.id == task_id, Task.user_id == owner_id, old.id == Task.id
+        )
+        if version is not None:
+            query = query.where(Task.version == version)
+        result = await db.execute(
+            query.values(
                 title=update_task.title.capitalize(),
                 description=update_task.description,
                 status=update_task.status,
                 user_id=update_task.user_id,
-            )
+                version=Task.version + 1,
+            ).returning(*cls.stored_columns(), old.title.label("old_title"))
         )
+        value = result.mappings().first()
+        if value is not None:
+            await cls.bump_changes(db)
         await db.commit()
+        if value is None:
+            return None, None
+        value = dict(value)
+        return value, value.pop("old_title")
+
+    @classmethod
+    async def get_owner_version(cls, db: AsyncSession, task_id: int):
+        """Метод для получения владельца и версии задачи (user_id, version)"""
+
+        result = await db.execute(
+            select(Task.user_id, Task.version).where(Task.id == task_id)
+        )
+        return result.first()
 
     @classmethod
     async def get_by_user_id(cls, db: AsyncSession, user_id: int):
-        """Метод для получения задачи через ее user_id"""
+        """Метод для получения задачи через ее user_id (первая по id)"""
 
-        return await db.scalar(
-            select(cls.model).where(cls.model.user_id == user_id)
+        loader = cls.loader(
+            db,
+            "user_id",
+            Task.user_id,
+            query=select(Task)
+            .distinct(Task.user_id)
+            .order_by(Task.user_id, Task.id),
         )
+        return await loader.load(user_id)
 
     @classmethod
     async def get_by_title(cls, db: AsyncSession, title: str):
         """Метод для получения задачи через ее название"""
 
-        return await db.scalar(
-            select(cls.model).where(cls.model.title == title.capitalize())
+        loader = cls.loader(db, "title", func.lower(Task.title), String)
+        return await loader.load(title.lower())
+
+    @classmethod
+    async def delete_owned(cls, db: AsyncSession, condition, owner_id: int):
+        """Удаляет задачу по условию, только если она принадлежит owner_id.
+
+        Один DELETE ... RETURNING; возвращает строку (id, title)
+        удаленной задачи или None, если подходящей задачи нет.
+        Коммит - за вызывающим.
+        """
+
+        result = await db.execute(
+            delete(Task)
+            .where(condition, Task.user_id == owner_id)
+            .returning(Task.id, Task.title)
         )
+        deleted = result.first()
+        if deleted is not None:
+            await cls.bump_changes(db)
+        return deleted
+
+    @classmethod
+    async def del_by_id(cls, db: AsyncSession, task_id: int, owner_id: int):
+        """Метод для удаления задачи владельца через ее ID"""
+
+        return await cls.delete_owned(db, Task.id == task_id, owner_id)
+
+    @classmethod
+    async def del_by_title(cls, db: AsyncSession, title: str, owner_id: int):
+        """Метод для удаления задачи владельца через ее название"""
+
+        return await cls.delete_owned(db, cls.title_is(title), owner_id)
 
     @classmethod
-    async def del_by_id(cls, db: AsyncSession, task_id: int):
-        """Метод для удаления задачи через ее user_id"""
+    def search_tsquery(cls, q: str, max_terms: int = 8):
+        """Префиксный tsquery из строки поиска: "rep bug" -> rep:* & bug:*
+
+        Из строки берутся только слова, поэтому синтаксис tsquery
+        (&, |, !, скобки) от клиента в запрос не попадает.
+        """
 
-        return await db.scalar(select(Task).where(Task.user_id == task_id))
+        terms = re.findall(r"\w+", q.lower())[:max_terms]
+        if not terms:
+            return None
+        return func.to_tsquery(
+            SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms)
+        )
 
     @classmethod
-    async def del_by_title(cls, db: AsyncSession, title: str):
-        """Метод для удаления задачи через ее название"""
+    async def search(cls, db: AsyncSession, q: str, page: PageParams):
+        """Метод для полнотекстового поиска задач по title и description.
+
+        Совпадения ищутся по GIN-индексу ix_task_search_vector,
+        сортируются по ts_rank (затем по id) и листаются курсором
+        (rank, id) последней строки страницы.
+        """
+
+        tsquery = cls.search_tsquery(q)
+        if tsquery is None:
+            return {"items": [], "next_cursor": None}
 
-        return await db.scalar(select(Task).where(Task.title == title))
+        rank = func.ts_rank(Task.search_vector, tsquery)
+        rank_label = rank.label("rank")
+        query = select(Task, rank_label).where(
+            Task.search_vector.bool_op("@@")(tsquery)
+        )
+        if page.after:
+            try:
+                after_rank = float(page.after["rank"])
+                after_id = int(page.after["id"])
+            except (KeyError, TypeError, ValueError):
+                raise InvalidCursor()
+            query = query.where(
+                or_(
+                    rank < after_rank,
+                    and_(rank == after_rank, Task.id > after_id),
+                )
+            )
+        values = await db.execute(
+            query.order_by(rank_label.desc(), Task.id).limit(page.limit + 1)
+        )
+        result = make_page(
+            values.all(),
+            page,
+            key=lambda row: {"rank": row.rank, "id": row.Task.id},
+        )
+        result["items"] = [row.Task for row in result["items"]]
+        return result
 
     @classmethod
-    async def get_users_tasks(cls, db: AsyncSession, username_id: int):
-        """Метод для получения всех товаров текущего пользователя"""
+    async def get_users_tasks(
+        cls, db: AsyncSession, username_id: int, page: PageParams
+    ):
+        """Метод для получения страницы товаров текущего пользователя"""
 
         values_tasks = await db.scalars(
-            select(Task).where(Task.user_id == username_id)
+            cls.paginate(select(Task).where(Task.user_id == username_id), page)
         )
-        return values_tasks.all()
+        return make_page(values_tasks.all(), page)
 
     @classmethod
-    async def get_free_tasks(cls, db: AsyncSession):
-        """Метод для получения всех задач, которые не имеют владельца"""
+    async def get_free_tasks(cls, db: AsyncSession, page: PageParams):
+        """Метод для получения страницы задач, которые не имеют владельца"""
 
-        values = await db.scalars(select(Task).where(Task.user_id.is_(None)))
-        return values.all()
+        values = await db.scalars(
+            cls.paginate(select(Task).where(Task.user_id.is_(None)), page)
+        )
+        return make_page(values.all(), page)
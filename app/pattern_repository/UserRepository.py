@@ -1,129 +1,262 @@
-from fastapi import HTTPException, status
-from passlib.context import CryptContext
-from sqlalchemy import insert, select, update
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import (
+    String,
+    delete,
+    exists,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.backend.db import AsyncSession
+from app.backend.pagination import PageParams, make_page
 from app.models.task import Task
 from app.models.user import User
 from app.pattern_repository.BaseRepository import BaseRepository
 from app.schemas import CreateUser
-
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.service.service_password import password_service
 
 
 class UserRepository(BaseRepository):
-    """Класс, в котором реализованы все специфичные методы только для работы с БД,
-    наследник базового репозитория"""
+    """Класс, в котором реализованы все специфичные методы только
+    для работы с БД, наследник базового репозитория"""
 
     model = User
+    export_columns = (User.id, User.name, User.email)
+
+    @classmethod
+    def name_is(cls, name: str):
+        """Условие поиска по имени через индекс ix_user_lower_name"""
+
+        return func.lower(User.name) == name.lower()
+
+    @classmethod
+    def email_is(cls, email: str):
+        """Условие поиска по почте через индекс ix_user_lower_email"""
+
+        return func.lower(User.email) == email.lower()
 
     @classmethod
-    async def get_free_users(cls, db: AsyncSession):
-        """Метод для получения всех пользователей, которые не имеют никакого товара в наличии"""
+    async def search(cls, db: AsyncSession, q: str, limit: int):
+        """Метод для нечеткого поиска пользователей по имени и почте.
 
-        lists_user_id = await db.scalars(select(User))
-        lists_user_id = [row.id for row in lists_user_id.all()]
-        lists_tasks_user_id = await db.scalars(select(Task))
-        lists_tasks_user_id = [row.user_id for row in lists_tasks_user_id]
-        free_users = []
-        for index in lists_user_id:
-            if index not in lists_tasks_user_id:
-                user = await db.scalar(
-                    select(User).where(User.id == int(index))
+        Отбор - оператор pg_trgm "lower(колонка) %> q" (q похоже на часть
+        значения) по GIN-индексам ix_user_name_trgm/ix_user_email_trgm;
+        сортировка по лучшему word_similarity. Возвращает не больше
+        limit строк без хеша пароля.
+        """
+
+        q = q.lower()
+        name, email = func.lower(User.name), func.lower(User.email)
+        similarity = func.greatest(
+            func.word_similarity(q, name), func.word_similarity(q, email)
+        ).label("similarity")
+        values = await db.execute(
+            select(User.id, User.name, User.email, similarity)
+            .where(
+                or_(
+                    name.bool_op("%>")(q),
+                    email.bool_op("%>")(q),
                 )
-                free_users.append(user)
-        return free_users
+            )
+            .order_by(similarity.desc(), User.id)
+            .limit(limit)
+        )
+        return [dict(row) for row in values.mappings().all()]
 
     @classmethod
-    async def update_user(
-        cls, db: AsyncSession, user_id: int, data: CreateUser
+    def free_users_query(cls):
+        """Пользователи без задач: anti-join (NOT EXISTS) по task.user_id"""
+
+        return select(User).where(~exists().where(Task.user_id == User.id))
+
+    @classmethod
+    async def get_free_users(cls, db: AsyncSession, page: PageParams):
+        """Метод для получения страницы пользователей, которые не имеют
+        никакого товара в наличии.
+
+        Один запрос NOT EXISTS вместо загрузки обеих таблиц в память;
+        подзапрос проверяется по индексу ix_task_user_id.
+        """
+
+        values = await db.scalars(cls.paginate(cls.free_users_query(), page))
+        return make_page(values.all(), page)
+
+    @classmethod
+    async def find_taken(
+        cls,
+        db: AsyncSession,
+        name: str,
+        email: str,
+        user_id: int | None = None,
     ):
-        """Метод для обновления данных пользователя"""
-
-        try:
-            await db.execute(
-                update(User)
-                .where(User.id == user_id)
-                .values(
-                    name=data.name.capitalize(),
-                    email=data.email.capitalize(),
-                    hashed_password=bcrypt_context.hash(data.password),
-                )
+        """Метод для проверки занятости имени и почты одним запросом.
+
+        Выбирает не больше трех строк по уникальным индексам lower(name),
+        lower(email) и первичному ключу (если передан user_id) вместо
+        чтения всей таблицы.
+        """
+
+        conditions = [cls.name_is(name), cls.email_is(email)]
+        if user_id is not None:
+            conditions.append(User.id == user_id)
+        values = await db.execute(
+            select(User.id, User.name, User.email, User.version).where(
+                or_(*conditions)
             )
-            await db.commit()
-
-            return {
-                "status_code": status.HTTP_200_OK,
-                "transaction": "User update is successful",
-            }
-        except IntegrityError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Bad request!"
+        )
+        return values.all()
+
+    @classmethod
+    async def taken_names_emails(
+        cls, db: AsyncSession, names, emails
+    ) -> tuple[set[str], set[str]]:
+        """Метод для проверки занятости наборов имен и почт одним запросом.
+
+        Возвращает занятые имена и почты в нижнем регистре.
+        """
+
+        if not names and not emails:
+            return set(), set()
+        values = await db.execute(
+            select(func.lower(User.name), func.lower(User.email)).where(
+                or_(
+                    func.lower(User.name).in_([name.lower() for name in names]),
+                    func.lower(User.email).in_(
+                        [email.lower() for email in emails]
+                    ),
+                )
             )
-        except:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Bad request!"
+        )
+        rows = values.all()
+        return {row[0] for row in rows}, {row[1] for row in rows}
+
+    @classmethod
+    async def create_users(
+        cls, db: AsyncSession, users: list[CreateUser], hashed: list[str]
+    ) -> set[tuple[str, str]]:
+        """Метод для создания пачки пользователей одним многострочным INSERT.
+
+        Пароли уже захешированы (hashed в том же порядке, что users).
+        Строки, занятые параллельной записью, пропускаются; возвращаются
+        пары (имя, почта) записанных пользователей в нижнем регистре.
+        """
+
+        values = await db.execute(
+            pg_insert(User)
+            .values(
+                [
+                    {
+                        "name": user.name.capitalize(),
+                        "email": user.email.capitalize(),
+                        "hashed_password": hashed_password,
+                    }
+                    for user, hashed_password in zip(users, hashed)
+                ]
             )
+            .on_conflict_do_nothing()
+            .returning(func.lower(User.name), func.lower(User.email))
+        )
+        created = set(values.tuples().all())
+        if created:
+            await cls.bump_changes(db)
+        await db.commit()
+        return created
+
+    @classmethod
+    async def update_user(
+        cls,
+        db: AsyncSession,
+        user_id: int,
+        data: CreateUser,
+        version: int | None = None,
+    ):
+        """Метод для обновления данных пользователя.
+
+        Один UPDATE ... WHERE id [AND version] RETURNING: версия
+        увеличивается, обновленная строка (без хеша пароля) возвращается
+        в том же запросе. None - строка не подошла под условие.
+        """
+
+        hashed_password = await password_service.hash(data.password)
+        query = update(User).where(User.id == user_id)
+        if version is not None:
+            query = query.where(User.version == version)
+        result = await db.execute(
+            query.values(
+                name=data.name.capitalize(),
+                email=data.email.capitalize(),
+                hashed_password=hashed_password,
+                version=User.version + 1,
+            ).returning(User.id, User.name, User.email, User.version)
+        )
+        value = result.mappings().first()
+        if value is not None:
+            await cls.bump_changes(db)
+        await db.commit()
+        return dict(value) if value is not None else None
 
     @classmethod
     async def create_user(cls, db: AsyncSession, create_user: CreateUser):
         """Метод для создания пользователя"""
 
+        hashed_password = await password_service.hash(create_user.password)
         await db.execute(
             insert(User).values(
                 name=create_user.name.capitalize(),
                 email=create_user.email.capitalize(),
-                hashed_password=bcrypt_context.hash(create_user.password),
+                hashed_password=hashed_password,
             )
         )
+        await cls.bump_changes(db)
         await db.commit()
 
-    @classmethod
-    async def get_by_id(cls, db: AsyncSession, user_id: int):
-        """Метод для получения пользователя через его ID"""
-
-        return await db.scalar(select(cls.model).where(cls.model.id == user_id))
-
     @classmethod
     async def get_by_name(cls, db: AsyncSession, name: str):
         """Метод для получения пользователя через его имя"""
 
-        return await db.scalar(
-            select(cls.model).where(cls.model.name == name.capitalize())
-        )
+        loader = cls.loader(db, "name", func.lower(User.name), String)
+        return await loader.load(name.lower())
 
     @classmethod
     async def get_by_email(cls, db: AsyncSession, email: str):
         """Метод для поучения пользователя через его почту"""
 
-        return await db.scalar(
-            select(cls.model).where(cls.model.email == email.capitalize())
+        loader = cls.loader(db, "email", func.lower(User.email), String)
+        return await loader.load(email.lower())
+
+    @classmethod
+    async def delete_self(cls, db: AsyncSession, condition, user_id: int):
+        """Удаляет пользователя по условию, только если это сам user_id.
+
+        Один DELETE ... RETURNING; возвращает ID удаленного пользователя
+        или None, если подходящей записи нет. Коммит - за вызывающим.
+        Счетчик задач тоже растет: ON DELETE SET NULL меняет их user_id.
+        """
+
+        deleted_id = await db.scalar(
+            delete(User).where(condition, User.id == user_id).returning(User.id)
         )
+        if deleted_id is not None:
+            await cls.bump_changes(db, "user", "task")
+        return deleted_id
 
     @classmethod
-    async def delete_user_id(cls, db: AsyncSession, user_id: int):
+    async def delete_user_id(cls, db: AsyncSession, user_id: int, me: int):
         """Метод, для удаления пользователя через его ID"""
 
-        value = await db.scalar(
-            select(cls.model).where(cls.model.id == user_id)
-        )
-        return value
+        return await cls.delete_self(db, User.id == user_id, me)
 
     @classmethod
-    async def delete_user_name(cls, db: AsyncSession, name: str):
+    async def delete_user_name(cls, db: AsyncSession, name: str, me: int):
         """Метод для удаления пользователя через его имя"""
 
-        value = await db.scalar(
-            select(cls.model).where(cls.model.name == name.capitalize())
-        )
-        return value
+        return await cls.delete_self(db, cls.name_is(name), me)
 
     @classmethod
-    async def delete_user_email(cls, db: AsyncSession, email: str):
+    async def delete_user_email(cls, db: AsyncSession, email: str, me: int):
         """Метод для удаления пользователя через его почту"""
 
-        value = await db.scalar(
-            select(cls.model).where(cls.model.email == email.capitalize())
-        )
-        return value
+        return await cls.delete_self(db, cls.email_is(email), me)
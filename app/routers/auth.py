@@ -1,17 +1,20 @@
 from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 from typing import Annotated
 
 import jwt
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
-from sqlalchemy import select
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.backend.auth_depends import get_current_user
 from app.backend.db_depends import get_db
+from app.backend.rate_limit import login_throttle
+from app.backend.revocation import revocation_list
 from app.is_valid import IsValidData
-from app.models.user import User
-from app.schemas import CreateUser
+from app.schemas import CreateUser, RefreshTokenRequest
+from app.service.service_password import password_service
+from app.service.service_token import TokenService
 from app.service.service_user import UserService
 from app.settings.config import Settings
 
@@ -23,8 +26,6 @@ SECRET_KEY = Settings.secret_key
 ALGORITHM = Settings.algorithm
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
 @router.post("/")
@@ -60,12 +61,15 @@ async def authenticate_user(
         HTTPException: 500 INTERNAL_SERVER_ERROR - при ошибках БД
 
     Notes:
-        - Использует bcrypt для проверки хеша пароля
+        - Имя сравнивается без учета регистра (индекс ix_user_lower_name)
+        - Проверка bcrypt-хеша выполняется в пуле password_service
         - Добавляет WWW-Authenticate header при ошибках
         - Требует предварительно хешированный пароль в БД
     """
-    user = await db.scalar(select(User).where(User.name == username))
-    if not user or not bcrypt_context.verify(password, user.hashed_password):
+    user = await UserService.get_by_name(db, username)
+    if not user or not await password_service.verify(
+        password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
@@ -77,17 +81,52 @@ async def authenticate_user(
 @router.post("/token")
 @base_exception
 async def login(
+    throttle: Annotated[None, Depends(login_throttle)],
     db: Annotated[AsyncSession, Depends(get_db)],
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ):
-    """Конечная точка для получения текущего токена пользователя"""
+    """Конечная точка для получения access- и refresh-токенов пользователя.
+
+    Лишние попытки отсекаются зависимостью login_throttle до запроса
+    к БД и проверки пароля.
+    """
 
     user = await authenticate_user(db, form_data.username, form_data.password)
 
     token = await create_access_token(
-        user.name, user.id, expires_delta=timedelta(minutes=20)
+        user.name,
+        user.id,
+        expires_delta=timedelta(minutes=Settings.access_token_expire_minutes),
+    )
+    refresh_token = await TokenService.issue_refresh_token(db, user.id)
+    return {
+        "access_token": token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post("/refresh")
+@base_exception
+async def refresh(
+    db: Annotated[AsyncSession, Depends(get_db)], data: RefreshTokenRequest
+):
+    """Конечная точка для обмена refresh-токена на новую пару токенов
+    без повторной проверки пароля"""
+
+    refresh_token, user_id, username = await TokenService.rotate_refresh_token(
+        db, data.refresh_token
+    )
+    token = await create_access_token(
+        username,
+        user_id,
+        expires_delta=timedelta(minutes=Settings.access_token_expire_minutes),
     )
-    return {"access_token": token, "token_type": "bearer"}
+    return {
+        "access_token": token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
 
 
 async def create_access_token(
@@ -106,10 +145,12 @@ async def create_access_token(
     Notes:
         - Временная метка expiration (exp) автоматически преобразуется в UNIX timestamp
         - Для подписи используется SECRET_KEY и ALGORITHM, определённые в модуле
+        - Поле jti позволяет отозвать конкретный токен (см. revocation_list)
     """
     payload = {
         "sub": username,
         "id": user_id,
+        "jti": uuid4().hex,
         "exp": datetime.now(timezone.utc) + expires_delta,
     }
 
@@ -118,74 +159,29 @@ async def create_access_token(
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    """Аутентифицирует пользователя по JWT-токену и возвращает его данные.
-
-    Args:
-        token (str): JWT-токен из заголовка Authorization (OAuth2 Bearer token).
-
-    Returns:
-        dict: Словарь с данными пользователя:
-            - username (str): Логин пользователя (subject из токена)
-            - id (int): ID пользователя
-
-    Raises:
-        HTTPException: 401 UNAUTHORIZED - если:
-            - токен просрочен (ExpiredSignatureError)
-            - невалидный username/subject
-            - общая ошибка валидации токена
-        HTTPException: 400 BAD_REQUEST - если:
-            - отсутствует expire в токене
-            - некорректный формат токена
-    """
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str | None = payload.get("sub")
-        user_id: int | None = payload.get("id")
-        expire: int | None = payload.get("exp")
-
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate user",
-            )
-        if expire is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No access token supplied",
-            )
-
-        if not isinstance(expire, int):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid token format",
-            )
-
-        # Проверка срока действия токена
-        current_time = datetime.now(timezone.utc).timestamp()
-
-        if expire < current_time:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token expired!",
-            )
-
-        return {"username": username, "id": user_id}
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired!"
-        )
-    except jwt.exceptions:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate user",
-        )
-
-
 @router.get("/read_current_user")
 @base_exception
 async def read_current_user(user: dict = Depends(get_current_user)):
     """Конечная точка для получения объекта пользователя(ID и username)"""
 
     return {"Users": user}
+
+
+@router.post("/logout")
+@base_exception
+async def logout(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user: Annotated[dict, Depends(get_current_user)],
+    data: RefreshTokenRequest | None = None,
+):
+    """Конечная точка для отзыва текущего access-токена.
+
+    Если передан refresh-токен, отзывается и вся его цепочка ротации.
+    """
+
+    if user["jti"] is not None:
+        await revocation_list.revoke(db, user["jti"], user["exp"])
+    if data is not None:
+        await TokenService.end_session(db, data.refresh_token, user["id"])
+    await db.commit()
+    return {"status": status.HTTP_200_OK, "message": "Token revoked"}
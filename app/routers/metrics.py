@@ -0,0 +1,75 @@
+from fastapi import APIRouter
+
+from app.backend.auth_depends import token_cache
+from app.backend.cache import response_cache
+from app.backend.db import engine, replica_engines
+from app.backend.db_depends import LazySession, replica_router
+from app.backend.rate_limit import login_rate_limiter
+from app.backend.revocation import revocation_list
+from app.backend.singleflight import flights
+from app.backend.sql_monitor import sql_monitor
+from app.service.service_password import password_service
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/password_hashing")
+async def get_password_hashing_metrics() -> dict:
+    """Конечная точка для получения метрик пула хеширования паролей"""
+
+    return password_service.metrics()
+
+
+@router.get("/token_cache")
+async def get_token_cache_metrics() -> dict:
+    """Конечная точка для получения метрик кеша проверенных JWT-токенов"""
+
+    return token_cache.metrics()
+
+
+@router.get("/cache")
+async def get_response_cache_metrics() -> dict:
+    """Конечная точка для получения метрик кеша ответов GET-эндпоинтов"""
+
+    return response_cache.metrics()
+
+
+@router.get("/singleflight")
+async def get_singleflight_metrics() -> dict:
+    """Конечная точка для получения метрик склейки одинаковых запросов"""
+
+    return {name: flight.metrics() for name, flight in flights.items()}
+
+
+@router.get("/revocation")
+async def get_revocation_metrics() -> dict:
+    """Конечная точка для получения метрик фильтра отозванных токенов"""
+
+    return revocation_list.metrics()
+
+
+@router.get("/login_rate_limit")
+async def get_login_rate_limit_metrics() -> dict:
+    """Конечная точка для получения метрик ограничения попыток логина"""
+
+    return login_rate_limiter.metrics()
+
+
+@router.get("/db/pool")
+async def get_db_pool_metrics() -> dict:
+    """Конечная точка для диагностики пулов соединений с primary и репликами"""
+
+    return {
+        "primary": engine.pool.status_dict(),
+        "replicas": [replica.pool.status_dict() for replica in replica_engines],
+        "routing": replica_router.metrics(),
+        # Сессии, объявленные обработчиками, и реально открытые из них
+        "sessions": dict(LazySession.stats),
+    }
+
+
+@router.get("/db/queries")
+async def get_db_query_metrics() -> dict:
+    """Конечная точка для получения счетчиков SQL-запросов"""
+
+    return sql_monitor.metrics()
@@ -1,16 +1,39 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.auth_depends import get_current_user
+from app.backend.cache import TASK_LIST, TASK_TITLE, response_cache
+from app.backend.db_depends import (
+    get_db,
+    get_read_db,
+    in_read_session,
+    open_read_session,
+    read_target,
+)
+from app.backend.etag import (
+    changes_etag,
+    conditional_get,
+    parse_if_match,
+    version_etag,
+)
+from app.backend.pagination import PageParams, get_page_params
+from app.exceptions.route_protection import base_exception
 from app.is_valid import IsValidData
 from app.pattern_repository.TaskRepository import TaskRepository
-from app.routers.auth import get_current_user
-from app.schemas import CreateTask
+from app.schemas import BatchTasks, CreateTask
 from app.service.service_task import TaskService
-
-from app.exceptions.route_protection import base_exception
+from app.settings.config import Settings
 
 router = APIRouter(prefix="/tasks", tags=["task"])
 
@@ -19,30 +42,89 @@ data = IsValidData()
 
 @router.get("/all")
 @base_exception
-async def get_all_tasks(db: Annotated[AsyncSession, Depends(get_db)]):
-    """Конечная точка для получения всех задач"""
-
-    return await TaskRepository.get_all(db)
+async def get_all_tasks(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    page: Annotated[PageParams, Depends(get_page_params)],
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """Конечная точка для получения задач постранично (курсор по id).
+
+    Ответ несет слабый ETag по счетчику изменений задач; с тем же
+    ETag в If-None-Match вернется 304 без чтения строк.
+    """
+
+    changes = await TaskRepository.get_changes(db)
+    return await conditional_get(
+        if_none_match,
+        changes_etag("task", changes),
+        lambda: response_cache.cached(
+            TASK_LIST,
+            page.model_dump(),
+            in_read_session(
+                request,
+                TaskRepository.with_changes(
+                    lambda session: TaskRepository.get_all(session, page)
+                ),
+            ),
+            version=changes,
+            target=read_target(request),
+            etag=lambda version: changes_etag("task", version),
+        ),
+    )
 
 
 @router.get("/")
 @base_exception
 async def get_task_id(
-    db: Annotated[AsyncSession, Depends(get_db)], task_user_id: int = 0
+    db: Annotated[AsyncSession, Depends(get_read_db)], task_user_id: int = 0
 ):
     """Конечная точка для получения задачи через ее ID"""
 
     return await TaskService.get_task_user_id(db, task_user_id)
 
 
+@router.post("/batch")
+@base_exception
+async def get_tasks_batch(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    batch: BatchTasks,
+):
+    """Конечная точка для получения задач пачкой по ID, названиям
+    и владельцам"""
+
+    return await TaskService.get_batch(db, batch)
+
+
 @router.get("/get/title")
 @base_exception
 async def get_task_title(
-    db: Annotated[AsyncSession, Depends(get_db)], title: str
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    title: str,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    """Конечная точка для получения задачи через ее название"""
-
-    return await TaskService.get_task_title(db, title)
+    """Конечная точка для получения задачи через ее название
+    (ETag и If-None-Match - как у /tasks/all)"""
+
+    changes = await TaskRepository.get_changes(db)
+    return await conditional_get(
+        if_none_match,
+        changes_etag("task", changes),
+        lambda: response_cache.cached(
+            TASK_TITLE,
+            {"title": title.lower()},
+            in_read_session(
+                request,
+                TaskRepository.with_changes(
+                    lambda session: TaskService.get_task_title(session, title)
+                ),
+            ),
+            version=changes,
+            target=read_target(request),
+            etag=lambda version: changes_etag("task", version),
+        ),
+    )
 
 
 @router.post("/")
@@ -58,6 +140,20 @@ async def create_new_task(
     return value
 
 
+@router.post("/bulk")
+@base_exception
+async def create_tasks_bulk(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    tasks: Annotated[
+        list[CreateTask], Body(max_length=Settings.bulk_max_rows)
+    ],
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    """Конечная точка для массового создания задач с ошибками по строкам"""
+
+    return await TaskService.create_bulk(db, tasks)
+
+
 @router.put("/")
 @base_exception
 async def update_to_info(
@@ -65,12 +161,19 @@ async def update_to_info(
     task_id: int,
     update_task: CreateTask,
     get_user: Annotated[dict, Depends(get_current_user)],
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    """Конечная точка для обновления информации о задаче"""
+    """Конечная точка для обновления информации о задаче.
+
+    С заголовком If-Match (ETag из прошлого ответа) задача обновится,
+    только если ее никто не изменил; новый ETag приходит в ответе.
+    """
 
     value = await TaskService.update_task_service(
-        db, update_task, task_id, get_user
+        db, update_task, task_id, get_user, parse_if_match(if_match)
     )
+    response.headers["ETag"] = version_etag(value["task"]["version"])
     return value
 
 
@@ -98,9 +201,44 @@ async def delete_task_title(
     return await TaskService.del_task_title(db, title, get_user)
 
 
-@router.get("get/free/tasks")
+@router.get("/get/free/tasks")
+@base_exception
+async def get_free_tasks(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    page: Annotated[PageParams, Depends(get_page_params)],
+):
+    """Конечная точка для получения задач без владельца постранично"""
+
+    return await TaskRepository.get_free_tasks(db, page)
+
+
+@router.get("/search")
 @base_exception
-async def get_free_tasks(db: Annotated[AsyncSession, Depends(get_db)]):
-    """Конечная точка для получения всех задач, которые не имеют владельца"""
+async def search_tasks(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    page: Annotated[PageParams, Depends(get_page_params)],
+):
+    """Конечная точка для полнотекстового поиска задач по названию и описанию.
+
+    Слова ищутся по префиксу ("rep" найдет "report"), результаты
+    отсортированы по релевантности и листаются курсором next_cursor.
+    """
+
+    return await TaskRepository.search(db, q, page)
 
-    return await TaskRepository.get_free_tasks(db)
+
+@router.get("/export")
+@base_exception
+async def export_tasks(
+    request: Request,
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    """Конечная точка для потоковой выгрузки всех задач в NDJSON"""
+
+    return StreamingResponse(
+        TaskRepository.stream_ndjson(
+            lambda: open_read_session(request), Settings.export_chunk_rows
+        ),
+        media_type="application/x-ndjson",
+    )
@@ -1,20 +1,50 @@
+import json
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.auth_depends import get_current_user
+from app.backend.cache import (
+    USER_ID,
+    USER_LIST,
+    json_body,
+    json_response,
+    response_cache,
+)
+from app.backend.db_depends import (
+    get_db,
+    get_read_db,
+    in_read_session,
+    open_read_session,
+    read_target,
+)
+from app.backend.etag import (
+    changes_etag,
+    conditional_get,
+    parse_if_match,
+    version_etag,
+)
+from app.backend.pagination import PageParams, get_page_params
+from app.backend.singleflight import get_flight
+from app.exceptions.route_protection import base_exception
 from app.is_valid import IsValidData
+from app.models.user import User
 from app.pattern_repository.TaskRepository import TaskRepository
 from app.pattern_repository.UserRepository import UserRepository
-from app.routers.auth import get_current_user
-from app.schemas import CreateUser
+from app.schemas import BatchUsers, CreateUser
 from app.service.service_user import UserService
-
-from app.exceptions.route_protection import base_exception
-
-from sqlalchemy import select
-from app.models.user import User
+from app.settings.config import Settings
 
 router = APIRouter(prefix="/users", tags=["user"])
 
@@ -23,36 +53,133 @@ data = IsValidData()
 
 @router.get("/")
 @base_exception
-async def get_all_users(db: Annotated[AsyncSession, Depends(get_db)]):
-    """Конечная точка для получения всех пользователей"""
-
-    value = await UserRepository.get_all(db)
-    return value
+async def get_all_users(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    page: Annotated[PageParams, Depends(get_page_params)],
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """Конечная точка для получения пользователей постранично (курсор по id).
+
+    Ответ несет слабый ETag по счетчику изменений пользователей; с тем
+    же ETag в If-None-Match вернется 304 без чтения строк.
+    """
+
+    changes = await UserRepository.get_changes(db)
+    return await conditional_get(
+        if_none_match,
+        changes_etag("user", changes),
+        lambda: response_cache.cached(
+            USER_LIST,
+            page.model_dump(),
+            in_read_session(
+                request,
+                UserRepository.with_changes(
+                    lambda session: UserRepository.get_all(session, page)
+                ),
+            ),
+            version=changes,
+            target=read_target(request),
+            etag=lambda version: changes_etag("user", version),
+        ),
+    )
 
 
 @router.get("/all/free/users")
 @base_exception
-async def get_free_users(db: Annotated[AsyncSession, Depends(get_db)]):
-    """Конечная точка для получения всех пользователей, которые не имеют товары в наличии"""
+async def get_free_users(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    page: Annotated[PageParams, Depends(get_page_params)],
+):
+    """Конечная точка для получения пользователей, которые не имеют товары
+    в наличии, постранично.
 
-    value = await UserRepository.get_free_users(db)
-    return value
+    Одинаковые одновременные запросы выполняют тяжелый запрос один раз;
+    в ключ входят счетчики изменений user и task и источник чтения,
+    так что запрос после записи не получит результат, начатый до нее.
+    """
+
+    changes = await UserRepository.changes_of(db, "user", "task")
+    key = json.dumps(
+        [page.model_dump(), changes, read_target(request)], sort_keys=True
+    )
+    load = in_read_session(
+        request, lambda session: UserRepository.get_free_users(session, page)
+    )
+
+    async def render() -> bytes:
+        return json_body(await load())
+
+    body = await get_flight("user.free").do(key, render)
+    return json_response(body)
+
+
+@router.get("/search")
+@base_exception
+async def search_users(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    q: Annotated[str, Query(min_length=3, max_length=100)],
+    limit: Annotated[
+        int, Query(ge=1, le=Settings.user_search_max_limit)
+    ] = Settings.user_search_default_limit,
+):
+    """Конечная точка для нечеткого поиска пользователей по имени и почте.
+
+    Находит и по части значения ("alic" -> "Alice"), результаты
+    отсортированы по похожести (similarity).
+    """
+
+    return await UserRepository.search(db, q, limit)
+
+
+@router.post("/batch")
+@base_exception
+async def get_users_batch(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    batch: BatchUsers,
+):
+    """Конечная точка для получения пользователей пачкой по ID, именам
+    и почтам"""
+
+    return await UserService.get_batch(db, batch)
 
 
 @router.get("/user/id")
 @base_exception
 async def get_user_id(
-    db: Annotated[AsyncSession, Depends(get_db)], user_id: int
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    user_id: int,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    """Конечная точка для получения пользователя через его ID"""
-
-    return await UserService.get_user_id(db, user_id)
+    """Конечная точка для получения пользователя через его ID
+    (ETag и If-None-Match - как у /users/)"""
+
+    changes = await UserRepository.get_changes(db)
+    return await conditional_get(
+        if_none_match,
+        changes_etag("user", changes),
+        lambda: response_cache.cached(
+            USER_ID,
+            {"user_id": user_id},
+            in_read_session(
+                request,
+                UserRepository.with_changes(
+                    lambda session: UserService.get_user_id(session, user_id)
+                ),
+            ),
+            version=changes,
+            target=read_target(request),
+            etag=lambda version: changes_etag("user", version),
+        ),
+    )
 
 
 @router.get("/user/name")
 @base_exception
 async def get_user_name(
-    db: Annotated[AsyncSession, Depends(get_db)], name: str
+    db: Annotated[AsyncSession, Depends(get_read_db)], name: str
 ):
     """Конечная точка для получения пользователя через его имя"""
 
@@ -62,13 +189,28 @@ async def get_user_name(
 @router.get("/user/email")
 @base_exception
 async def get_user_email(
-    db: Annotated[AsyncSession, Depends(get_db)], email: str
+    db: Annotated[AsyncSession, Depends(get_read_db)], email: str
 ):
     """Конечная точка для получения пользователя через его почту"""
 
     return await UserService.get_user_email(db, email)
 
 
+@router.post("/bulk")
+@base_exception
+async def create_users_bulk(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    users: Annotated[
+        list[CreateUser], Body(max_length=Settings.bulk_max_rows)
+    ],
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    """Конечная точка для массового создания пользователей с ошибками
+    по строкам"""
+
+    return await UserService.create_bulk(db, users)
+
+
 @router.put("/")
 @base_exception
 async def update_to_info(
@@ -76,10 +218,20 @@ async def update_to_info(
     user_id: int,
     update_user: CreateUser,
     get_user: Annotated[dict, Depends(get_current_user)],
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ):
-    """Конечная точка для обновления информации о пользователе"""
+    """Конечная точка для обновления информации о пользователе.
+
+    С заголовком If-Match (ETag из прошлого ответа) пользователь
+    обновится, только если его никто не изменил; новый ETag приходит
+    в ответе.
+    """
 
-    value = await UserService.update(db, user_id, update_user, get_user)
+    value = await UserService.update(
+        db, user_id, update_user, get_user, parse_if_match(if_match)
+    )
+    response.headers["ETag"] = version_etag(value["user"]["version"])
     return value
 
 
@@ -122,12 +274,32 @@ async def delete_user_email(
 @router.get("/get_all_tasks_current_user")
 @base_exception
 async def get_tasks(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    page: Annotated[PageParams, Depends(get_page_params)],
     username_id: dict = Depends(get_current_user),
 ):
-    """Конечная точка для получения всех товаров текущего(авторизованного) пользователя"""
+    """Конечная точка для получения товаров текущего(авторизованного)
+    пользователя постранично"""
+
+    return await TaskRepository.get_users_tasks(db, username_id["id"], page)
+
+
+@router.get("/export")
+@base_exception
+async def export_users(
+    request: Request,
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    """Конечная точка для потоковой выгрузки всех пользователей в NDJSON
+    (без хешей паролей)"""
+
+    return StreamingResponse(
+        UserRepository.stream_ndjson(
+            lambda: open_read_session(request), Settings.export_chunk_rows
+        ),
+        media_type="application/x-ndjson",
+    )
 
-    return await TaskRepository.get_users_tasks(db, username_id["id"])
 
 @router.get('/welcome/frensski')
 @base_exception
@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+from typing import Annotated
+
+from pydantic import BaseModel, Field
+
+from app.settings.config import Settings
 
 
 class Base(BaseModel):
@@ -20,3 +24,27 @@ class CreateTask(Base):
     description: str
     status: str
     user_id: int
+
+
+class BatchUsers(Base):
+    """Схема пакетного поиска пользователей по ID, именам и почтам"""
+
+    ids: Annotated[list[int], Field(max_length=Settings.batch_max_keys)] = []
+    names: Annotated[list[str], Field(max_length=Settings.batch_max_keys)] = []
+    emails: Annotated[list[str], Field(max_length=Settings.batch_max_keys)] = []
+
+
+class BatchTasks(Base):
+    """Схема пакетного поиска задач по ID, названиям и ID владельцев"""
+
+    ids: Annotated[list[int], Field(max_length=Settings.batch_max_keys)] = []
+    titles: Annotated[list[str], Field(max_length=Settings.batch_max_keys)] = []
+    user_ids: Annotated[
+        list[int], Field(max_length=Settings.batch_max_keys)
+    ] = []
+
+
+class RefreshTokenRequest(Base):
+    """Схема для обмена refresh-токена на новую пару токенов"""
+
+    refresh_token: str
@@ -0,0 +1,33 @@
+from fastapi import HTTPException, status
+
+
+class BulkResult:
+    """Итог массового создания: число записанных строк и ошибки по строкам.
+
+    Ошибка строки хранит ее индекс в запросе и то же исключение API,
+    которое вернул бы одиночный эндпоинт.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def reject(self, index: int, error: HTTPException):
+        self.errors.append(
+            {
+                "index": index,
+                "status_code": error.status_code,
+                "detail": error.detail,
+            }
+        )
+
+    def report(self) -> dict:
+        return {
+            "status_code": (
+                status.HTTP_201_CREATED
+                if self.created or not self.errors
+                else status.HTTP_400_BAD_REQUEST
+            ),
+            "created": self.created,
+            "errors": sorted(self.errors, key=lambda error: error["index"]),
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
+from passlib.context import CryptContext
+
+from app.exceptions.exceptions import HashingOverloaded
+from app.settings.config import Settings
+
+bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    """Хеширует пароль (выполняется в пуле, должна быть picklable)"""
+
+    return bcrypt_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    """Проверяет пароль по хешу (выполняется в пуле, должна быть picklable)"""
+
+    return bcrypt_context.verify(password, hashed_password)
+
+
+class PasswordService:
+    """Сервис для хеширования и проверки паролей вне event loop.
+
+    bcrypt занимает десятки миллисекунд CPU на каждый вызов, поэтому
+    вся работа уходит в ограниченный пул потоков или процессов.
+    Если в очереди уже больше max_queue задач, новая задача сразу
+    отклоняется с HashingOverloaded, а не копится в памяти.
+    """
+
+    def __init__(
+        self,
+        executor: str = Settings.password_hash_executor,
+        workers: int = Settings.password_hash_workers,
+        max_queue: int = Settings.password_hash_max_queue,
+    ):
+        self.executor_type = executor
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._stats = {
+            "hash_calls": 0,
+            "verify_calls": 0,
+            "rejected": 0,
+            "errors": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "max_pending": 0,
+        }
+
+    def _get_executor(self) -> Executor:
+        """Лениво создает пул, чтобы не плодить процессы при импорте"""
+
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, func, *args):
+        """Отправляет задачу в пул с учетом лимита очереди и метрик"""
+
+        if self._pending >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise HashingOverloaded()
+
+        self._pending += 1
+        self._stats["max_pending"] = max(
+            self._stats["max_pending"], self._pending
+        )
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), func, *args
+            )
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            self._pending -= 1
+            elapsed = time.perf_counter() - start
+            self._stats["total_seconds"] += elapsed
+            self._stats["max_seconds"] = max(
+                self._stats["max_seconds"], elapsed
+            )
+
+    async def hash(self, password: str) -> str:
+        """Возвращает bcrypt-хеш пароля"""
+
+        self._stats["hash_calls"] += 1
+        return await self._run(_hash, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Хеширует пачку паролей параллельно на всех воркерах пула.
+
+        Одновременно в очереди не больше workers задач пачки, поэтому
+        массовое создание не вытесняет одиночные логины по max_queue.
+        """
+
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                return await self.hash(password)
+
+        return await asyncio.gather(*(hash_one(p) for p in passwords))
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Проверяет соответствие пароля его хешу"""
+
+        self._stats["verify_calls"] += 1
+        return await self._run(_verify, password, hashed_password)
+
+    def metrics(self) -> dict:
+        """Текущее состояние пула и накопленные счетчики"""
+
+        calls = self._stats["hash_calls"] + self._stats["verify_calls"]
+        avg = self._stats["total_seconds"] / calls if calls else 0.0
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            **self._stats,
+            "avg_seconds": avg,
+        }
+
+    def shutdown(self):
+        """Останавливает пул (вызывается при остановке приложения)"""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_service = PasswordService()
@@ -1,83 +1,44 @@
-from datetime import datetime, timezone
+import asyncio
 from typing import Annotated
 
-import jwt
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select
+from fastapi import Depends, status
 from sqlalchemy.exc import IntegrityError
 
+from app.backend.auth_depends import get_current_user
+from app.backend.cache import TASK_LIST, TASK_TITLE, response_cache
 from app.backend.db_depends import AsyncSession
 from app.is_valid import IsValidData
 from app.models.task import Task
-from app.models.user import User
 from app.pattern_repository.TaskRepository import TaskRepository
-from app.schemas import CreateTask
-from app.settings.config import Settings
+from app.pattern_repository.UserRepository import UserRepository
+from app.service.bulk import BulkResult
+from app.schemas import BatchTasks, CreateTask
 
 from app.exceptions.exceptions import *
+from app.exceptions.integrity import integrity_exception
 
-data = IsValidData()
-
-SECRET_KEY = Settings.secret_key
-ALGORITHM = Settings.algorithm
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
-
-
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    """Аутентифицирует пользователя по JWT-токену и возвращает его данные.
-
-    Args:
-        token (str): JWT-токен из заголовка Authorization (OAuth2 Bearer token).
-
-    Returns:
-        dict: Словарь с данными пользователя:
-            - username (str): Логин пользователя (subject из токена)
-            - id (int): ID пользователя
+CREATE_ERRORS = {"title": InvalidTitleTask, "user_id": IntegError}
+UPDATE_ERRORS = {"title": InvalidTitleTask, "user_id": TaskNotFound}
 
-    Raises:
-        HTTPException: 401 UNAUTHORIZED - если:
-            - токен просрочен (ExpiredSignatureError)
-            - невалидный username/subject
-            - общая ошибка валидации токена
-        HTTPException: 400 BAD_REQUEST - если:
-            - отсутствует expire в токене
-            - некорректный формат токена
-    """
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str | None = payload.get("sub")
-        user_id: int | None = payload.get("id")
-        expire: int | None = payload.get("exp")
-
-        if username is None:
-            raise UserNotAutorized()
-
-        if expire is None:
-            raise NoAccesToken()
-
-        if not isinstance(expire, int):
-            raise TokenExpired()
-
-        # Проверка срока действия токена
-        current_time = datetime.now(timezone.utc).timestamp()
-
-        if expire < current_time:
-            raise TokenExpired()
+data = IsValidData()
 
-        return {"username": username, "id": user_id}
 
-    except jwt.ExpiredSignatureError:
-        raise TokenExpired()
-    except jwt.exceptions:
-        raise UserNotAutorized()
+class TaskService(TaskRepository):
+    """Класс, в котором содержится вся проверка конечных точек"""
 
+    @classmethod
+    async def _invalidate(cls, *titles: str | None):
+        """Сбрасывает кеш ответов после закоммиченной записи задач.
 
+        Ответы /tasks/get/title удаляются точечно по названиям,
+        страницы /tasks/all - сменой поколения списка.
+        """
 
-class TaskService(TaskRepository):
-    """Класс, в котором содержится вся проверка конечных точек"""
+        await response_cache.invalidate(
+            TASK_TITLE,
+            *({"title": title.lower()} for title in titles if title),
+        )
+        await response_cache.invalidate_all(TASK_LIST)
 
     @classmethod
     async def get_task_user_id(cls, db: AsyncSession, user_id: int):
@@ -107,11 +68,11 @@ class TaskService(TaskRepository):
 
     @classmethod
     async def get_task_title(cls, db: AsyncSession, title: str):
-        """Получает задачу по точному совпадению названия.
+        """Получает задачу по названию без учета регистра.
 
         Args:
             db (AsyncSession): Асинхронная сессия подключения к БД
-            title (str): Название задачи для поиска (точное совпадение)
+            title (str): Название задачи для поиска (без учета регистра)
 
         Returns:
             Task: Объект найденной задачи со всеми полями
@@ -121,7 +82,7 @@ class TaskService(TaskRepository):
             HTTPException: 500 INTERNAL_SERVER_ERROR - при ошибках работы с БД
 
         Notes:
-            - Поиск выполняется по точному совпадению названия (case-sensitive)
+            - Поиск выполняется без учета регистра по индексу lower(title)
             - Использует TaskRepository.get_by_title для получения данных
             - Возвращает полный объект задачи со всеми отношениями
         """
@@ -132,6 +93,28 @@ class TaskService(TaskRepository):
             raise TaskNotFound()
         return value
 
+    @classmethod
+    async def get_batch(cls, db: AsyncSession, batch: BatchTasks):
+        """Получает задачи по спискам ID, названий и ID владельцев.
+
+        Поиски идут через DataLoader запроса: повторы схлопываются, а на
+        каждый вид ключа уходит один запрос WHERE ... = ANY(:keys).
+        Ответ повторяет порядок запроса; ненайденные ключи - null.
+        Для владельца возвращается его первая задача, как в
+        get_task_user_id.
+        """
+
+        ids, titles, user_ids = await asyncio.gather(
+            asyncio.gather(*(cls.get_by_id(db, key) for key in batch.ids)),
+            asyncio.gather(
+                *(cls.get_by_title(db, key) for key in batch.titles)
+            ),
+            asyncio.gather(
+                *(cls.get_by_user_id(db, key) for key in batch.user_ids)
+            ),
+        )
+        return {"ids": ids, "titles": titles, "user_ids": user_ids}
+
     @classmethod
     async def create_by_task(cls, db: AsyncSession, create_task: CreateTask):
         """Создает новую задачу с валидацией входных данных.
@@ -160,37 +143,109 @@ class TaskService(TaskRepository):
             HTTPException: 500 INTERNAL_SERVER_ERROR - при других ошибках БД
 
         Notes:
-            - Название задачи нормализуется (capitalize) перед проверкой уникальности
+            - Название задачи нормализуется (capitalize) перед сохранением
+            - Уникальность названия и существование пользователя проверяет
+              сама БД (UNIQUE и FOREIGN KEY), без чтения таблиц
             - Использует TaskRepository.create_task для сохранения
             - Валидация выполняется через методы data.is_valid_*
         """
 
+        if not (data.is_valid_title(create_task.title)):
+            raise InvalidTitleTask()
+        elif not (data.is_valid_status(create_task.status)):
+            raise InvalidStatusTask()
+        elif not (data.is_valid_description(create_task.description)):
+            raise InvalidDescTask()
+
         try:
-            lists_id = await db.scalars(select(User))
-            lists_id = [obj.id for obj in lists_id.all()]
-            lists_title = await db.scalars(select(Task))
-            lists_title = [row.title.capitalize() for row in lists_title.all()]
-            lists_user_id = await db.scalars(select(Task))
-            lists_user_id = [row.user_id for row in lists_user_id.all()]
-
-            if (not (data.is_valid_title(create_task.title))) or (
-                create_task.title.capitalize() in lists_title
-            ):
-                raise InvalidTitleTask()
-            elif not (data.is_valid_status(create_task.status)):
-                raise InvalidStatusTask()
-            elif not (data.is_valid_description(create_task.description)):
-                raise InvalidDescTask()
-            else:
-                await TaskRepository.create_task(db, create_task)
+            await TaskRepository.create_task(db, create_task)
+        except IntegrityError as error:
+            await db.rollback()
+            raise integrity_exception(error, CREATE_ERRORS, IntegError)
+
+        await cls._invalidate(create_task.title)
+        return {
+            "status": status.HTTP_201_CREATED,
+            "message": "Task successful created!",
+        }
 
-                return {
-                    "status": status.HTTP_201_CREATED,
-                    "message": "Task successful created!",
-                }
+    @classmethod
+    async def create_bulk(cls, db: AsyncSession, tasks: list[CreateTask]):
+        """Создает пачку задач с построчной валидацией.
+
+        Проверки те же, что в create_by_task, но занятость названий и
+        существование пользователей проверяются одним запросом на всю
+        пачку, а запись идет одним INSERT в одной транзакции. Строки
+        с ошибками пропускаются и попадают в errors с индексом; если
+        INSERT упал на внешнем ключе, строки разбираются повторно.
 
-        except IntegrityError:
-            raise IntegError()
+        Returns:
+            dict: status_code, created - число созданных задач,
+                errors - ошибки по строкам (index, status_code, detail)
+        """
+
+        result = BulkResult()
+        candidates = {}
+        for index, task in enumerate(tasks):
+            if not (data.is_valid_title(task.title)) or (
+                task.title.lower() in candidates
+            ):
+                result.reject(index, InvalidTitleTask())
+            elif not (data.is_valid_status(task.status)):
+                result.reject(index, InvalidStatusTask())
+            elif not (data.is_valid_description(task.description)):
+                result.reject(index, InvalidDescTask())
+            else:
+                candidates[task.title.lower()] = index
+
+        taken = await TaskRepository.taken_titles(db, list(candidates))
+        user_ids = await UserRepository.existing_ids(
+            db, {tasks[index].user_id for index in candidates.values()}
+        )
+        rows = {}
+        for title, index in candidates.items():
+            if title in taken:
+                result.reject(index, InvalidTitleTask())
+            elif tasks[index].user_id not in user_ids:
+                result.reject(index, IntegError())
+            else:
+                rows[title] = index
+
+        for attempt in range(2):
+            if not rows:
+                break
+            try:
+                created = await TaskRepository.create_tasks(
+                    db, [tasks[index] for index in rows.values()]
+                )
+            except IntegrityError as error:
+                # Пользователя удалили между проверкой и INSERT: падает
+                # вся пачка, поэтому разбираем строки и пробуем еще раз
+                await db.rollback()
+                if attempt:
+                    for index in rows.values():
+                        result.reject(
+                            index,
+                            integrity_exception(
+                                error, CREATE_ERRORS, IntegError
+                            ),
+                        )
+                    break
+                user_ids = await UserRepository.existing_ids(
+                    db, {tasks[index].user_id for index in rows.values()}
+                )
+                for title, index in list(rows.items()):
+                    if tasks[index].user_id not in user_ids:
+                        result.reject(index, IntegError())
+                        del rows[title]
+                continue
+            result.created = len(created)
+            for title, index in rows.items():
+                if title not in created:
+                    result.reject(index, InvalidTitleTask())
+            await cls._invalidate(*created)
+            break
+        return result.report()
 
     @classmethod
     async def update_task_service(
@@ -199,25 +254,28 @@ class TaskService(TaskRepository):
         update_task: CreateTask,
         task_id,
         get_user: Annotated[dict, Depends(get_current_user)],
+        version: int | None = None,
     ):
         """Обновляет существующую задачу с комплексной валидацией.
 
         Выполняет проверки перед обновлением:
-        - Права доступа пользователя к задаче
-        - Уникальность нового названия задачи
-        - Валидность статуса и описания
-        - Существование задачи
+        - Валидность названия, статуса и описания
+        - Права доступа, существование и версия задачи - условием
+          в самом UPDATE ... RETURNING (оптимистическая блокировка)
 
         Args:
             db (AsyncSession): Асинхронная сессия БД
             update_task (CreateTask): DTO с обновляемыми данными задачи
             task_id (int): ID обновляемой задачи
             get_user (dict): Текущий аутентифицированный пользователь (из Depends)
+            version (int | None): Ожидаемая версия задачи из If-Match
+                (None - обновлять без проверки версии)
 
         Returns:
             dict: Результат операции:
                 - status (int): HTTP 200 при успехе
                 - message (str): Сообщение о результате
+                - task (dict): Обновленная задача с новой версией
 
         Raises:
             HTTPException: 403 FORBIDDEN - при:
@@ -227,48 +285,68 @@ class TaskService(TaskRepository):
                 - отсутствии прав доступа
                 - несуществующей задаче
                 - ошибках целостности
+            HTTPException: 412 PRECONDITION_FAILED - если версия задачи
+                не совпала с If-Match (задачу уже изменили)
             HTTPException: 500 INTERNAL_SERVER_ERROR - при ошибках БД
 
         Notes:
-            - Проверяет принадлежность задачи пользователю
-            - Название нормализуется (capitalize) при проверке уникальности
+            - Уникальность названия проверяет ограничение UNIQUE
+            - В успешном случае это один запрос; причина неудачи
+              (404 / чужая задача / 412) выясняется отдельным SELECT
             - Использует TaskRepository.update_by для сохранения изменений
             - Валидация через data.is_valid_* методы
         """
 
-        try:
-            lists_id = await db.scalars(select(User))
-            lists_id = [obj.id for obj in lists_id.all()]
-            lists_title = await db.scalars(select(Task))
-            lists_title = [row.title for row in lists_title.all()]
-            lists_user_id = await db.scalars(select(Task))
-            lists_user_id = [row.user_id for row in lists_user_id.all()]
-
-            create_task = update_task
+        if not (data.is_valid_title(update_task.title)):
+            raise InvalidTitleTask()
+        elif not (data.is_valid_status(update_task.status)):
+            raise InvalidStatusTask()
+        elif not (data.is_valid_description(update_task.description)):
+            raise InvalidDescTask()
 
-            if get_user.get("id") != task_id:
-                raise NoUseTask()
-            elif (not (data.is_valid_title(create_task.title))) or (
-                create_task.title.capitalize() in lists_title
-            ):
-                raise InvalidTitleTask()
-            elif not (data.is_valid_status(create_task.status)):
-                raise InvalidStatusTask()
-            elif not (data.is_valid_description(create_task.description)):
-                raise InvalidDescTask()
-            if task_id not in lists_user_id:
+        try:
+            updated, old_title = await TaskRepository.update_by(
+                db, update_task, task_id, get_user.get("id"), version
+            )
+        except IntegrityError as error:
+            await db.rollback()
+            raise integrity_exception(error, UPDATE_ERRORS, TaskNotFound)
+
+        if updated is None:
+            current = await TaskRepository.get_owner_version(db, task_id)
+            if current is None:
                 raise TaskNotFound()
-            else:
+            elif current.user_id != get_user.get("id"):
+                raise NoUseTask()
+            raise PreconditionFailed()
+        await cls._invalidate(old_title, updated["title"])
+        return {
+            "status": status.HTTP_200_OK,
+            "message": "Successful update tasks",
+            "task": updated,
+        }
+
+    @classmethod
+    async def _finish_delete(cls, db: AsyncSession, deleted, condition):
+        """Завершает удаление: коммит или разбор, почему не удалилось.
 
-                await TaskRepository.update_by(db, update_task, task_id)
-                return {
-                    "status": status.HTTP_200_OK,
-                    "message": "Successful update tasks",
-                }
+        DELETE уже проверил и ключ, и владельца; лишний запрос EXISTS
+        делается только при неудаче, чтобы отличить чужую задачу от
+        несуществующей.
+        """
 
-        except IntegrityError:
+        if deleted is None:
+            if await TaskRepository.exists_where(db, condition):
+                raise NoUseTask()
             raise TaskNotFound()
 
+        await db.commit()
+        await cls._invalidate(deleted.title)
+        return {
+            "status": status.HTTP_200_OK,
+            "message": "Task succesful deleted",
+        }
+
     @classmethod
     async def del_task_id(
         cls,
@@ -278,9 +356,8 @@ class TaskService(TaskRepository):
     ):
         """Удаляет задачу по ID после проверки прав доступа.
 
-        Выполняет двухэтапную проверку:
-        1. Существование задачи с указанным ID
-        2. Принадлежность задачи текущему пользователю
+        Удаление и проверка владельца выполняются одним запросом
+        DELETE ... WHERE id = :task_id AND user_id = :me RETURNING id.
 
         Args:
             db (AsyncSession): Асинхронная сессия подключения к БД
@@ -298,26 +375,14 @@ class TaskService(TaskRepository):
             HTTPException: 500 INTERNAL_SERVER_ERROR - при ошибках БД
 
         Notes:
-            - Использует TaskRepository.del_by_id для поиска задачи
-            - Проверяет соответствие user_id задачи и текущего пользователя
-            - Выполняет физическое удаление записи из БД
+            - Использует TaskRepository.del_by_id для удаления
+            - При неудаче один EXISTS отличает чужую задачу от отсутствующей
         """
 
-        value = await TaskRepository.del_by_id(db, task_id)
-
-        if value is None:
-            raise TaskNotFound()
-
-        if get_user.get("id") == value.user_id:
-            value = await TaskRepository.del_by_id(db, task_id)
-            await db.delete(value)
-            await db.commit()
-            return {
-                "status": status.HTTP_200_OK,
-                "message": "Task succesful deleted",
-            }
-        else:
-            raise NoUseTask()
+        deleted = await TaskRepository.del_by_id(
+            db, task_id, get_user.get("id")
+        )
+        return await cls._finish_delete(db, deleted, Task.id == task_id)
 
     @classmethod
     async def del_task_title(
@@ -330,7 +395,7 @@ class TaskService(TaskRepository):
 
         Args:
             db (AsyncSession): Асинхронная сессия БД
-            title (str): Название задачи для удаления (точное совпадение)
+            title (str): Название задачи для удаления (без учета регистра)
             get_user (dict): Данные аутентифицированного пользователя из токена
 
         Returns:
@@ -343,24 +408,14 @@ class TaskService(TaskRepository):
             HTTPException: 403_FORBIDDEN - если задача принадлежит другому пользователю
 
         Notes:
-            - Поиск задачи выполняется по точному совпадению названия
-            - Проверяет соответствие user_id задачи и текущего пользователя
-            - Использует TaskRepository.del_by_title для поиска задачи
-            - Выполняет физическое удаление через сессию БД
+            - Поиск задачи выполняется по названию без учета регистра
+            - Удаление и проверка владельца - один DELETE ... RETURNING
+            - Использует TaskRepository.del_by_title для удаления
         """
 
-        value = await TaskRepository.del_by_title(db, title)
-
-        if value is None:
-            raise TaskNotFound()
-
-        if get_user.get("id") == value.user_id:
-            value = await TaskRepository.del_by_title(db, title)
-            await db.delete(value)
-            await db.commit()
-            return {
-                "status": status.HTTP_200_OK,
-                "message": "Task succesful deleted",
-            }
-        else:
-            raise NoUseTask()
+        deleted = await TaskRepository.del_by_title(
+            db, title, get_user.get("id")
+        )
+        return await cls._finish_delete(
+            db, deleted, TaskRepository.title_is(title)
+        )
@@ -0,0 +1,70 @@
+from app.backend.db_depends import AsyncSession
+from app.exceptions.exceptions import InvalidRefreshToken
+from app.pattern_repository.RefreshTokenRepository import (
+    RefreshTokenRepository,
+)
+
+
+class TokenService(RefreshTokenRepository):
+    """Класс, в котором содержится логика выдачи и ротации refresh-токенов"""
+
+    @classmethod
+    async def issue_refresh_token(cls, db: AsyncSession, user_id: int) -> str:
+        """Выдает новый refresh-токен после успешного логина"""
+
+        token = await RefreshTokenRepository.add_token(db, user_id)
+        await db.commit()
+        return token
+
+    @classmethod
+    async def rotate_refresh_token(cls, db: AsyncSession, token: str):
+        """Обменивает refresh-токен на новый без проверки пароля.
+
+        Args:
+            db (AsyncSession): Асинхронная сессия БД
+            token (str): Текущий refresh-токен клиента
+
+        Returns:
+            tuple: (новый refresh-токен, ID пользователя, имя пользователя)
+
+        Raises:
+            HTTPException: 401 UNAUTHORIZED - если токен не найден,
+                истек или уже был использован
+
+        Notes:
+            - Старый токен помечается использованным, новый получает
+              полный срок жизни (скользящая сессия)
+            - Повторное предъявление уже использованного токена считается
+              утечкой: отзывается вся цепочка ротации
+        """
+
+        row = await RefreshTokenRepository.consume(db, token)
+
+        if row is None:
+            family_id = await RefreshTokenRepository.get_family(db, token)
+            if family_id is not None:
+                await RefreshTokenRepository.revoke_family(db, family_id)
+                await db.commit()
+            raise InvalidRefreshToken()
+
+        new_token = await RefreshTokenRepository.add_token(
+            db, row.user_id, row.family_id
+        )
+        await db.commit()
+        return new_token, row.user_id, row.name
+
+    @classmethod
+    async def end_session(cls, db: AsyncSession, token: str, user_id: int):
+        """Отзывает всю цепочку ротации refresh-токена при выходе.
+
+        Отзывается не только предъявленный токен, но и все его
+        предшественники и преемники: ни один токен этого логина больше
+        не обменяется на новую пару. Чужой токен игнорируется.
+        Коммит выполняет вызывающий код.
+        """
+
+        family_id = await RefreshTokenRepository.get_family(
+            db, token, user_id
+        )
+        if family_id is not None:
+            await RefreshTokenRepository.revoke_family(db, family_id)
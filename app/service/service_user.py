@@ -1,80 +1,83 @@
-from datetime import datetime, timezone
+import asyncio
 from typing import Annotated
 
-import jwt
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select
+from fastapi import Depends, status
 from sqlalchemy.exc import IntegrityError
 
+from app.backend.auth_depends import get_current_user
+from app.backend.cache import (
+    TASK_LIST,
+    TASK_TITLE,
+    USER_ID,
+    USER_LIST,
+    response_cache,
+)
 from app.backend.db_depends import AsyncSession
+from app.backend.revocation import revocation_list
 from app.is_valid import IsValidData
 from app.models.user import User
 from app.pattern_repository.UserRepository import UserRepository
-from app.schemas import CreateUser
-from app.settings.config import Settings
+from app.schemas import BatchUsers, CreateUser
+from app.service.bulk import BulkResult
+from app.service.service_password import password_service
 
 from app.exceptions.exceptions import *
+from app.exceptions.integrity import integrity_exception
 
-data = IsValidData()
-
-SECRET_KEY = Settings.secret_key
-ALGORITHM = Settings.algorithm
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
-
-
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    """Аутентифицирует пользователя по JWT-токену и возвращает его данные.
-
-    Args:
-        token (str): JWT-токен из заголовка Authorization (OAuth2 Bearer token).
+USER_ERRORS = {"name": InvalidName, "email": InvalidEmail}
 
-    Returns:
-        dict: Словарь с данными пользователя:
-            - username (str): Логин пользователя (subject из токена)
-            - id (int): ID пользователя
-
-    Raises:
-        HTTPException: 401 UNAUTHORIZED - если:
-            - токен просрочен (ExpiredSignatureError)
-            - невалидный username/subject
-            - общая ошибка валидации токена
-        HTTPException: 400 BAD_REQUEST - если:
-            - отсутствует expire в токене
-            - некорректный формат токена
-    """
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str | None = payload.get("sub")
-        user_id: int | None = payload.get("id")
-        expire: int | None = payload.get("exp")
+data = IsValidData()
 
-        if username is None:
-            raise UserNotAutorized()
 
-        if expire is None:
-            raise NoAccesToken()
+class UserService(UserRepository):
 
-        if not isinstance(expire, int):
-            raise TokenExpired()
+    @classmethod
+    def _check_taken(
+        cls,
+        taken,
+        user: CreateUser,
+        user_id: int | None = None,
+        version: int | None = None,
+    ):
+        """Разбирает результат find_taken: 404, 412 или занятое имя/почта"""
+
+        if user_id is not None:
+            current = [row for row in taken if row.id == user_id]
+            if not current:
+                raise NotFoundUser()
+            if version is not None and current[0].version != version:
+                raise PreconditionFailed()
+        others = [row for row in taken if row.id != user_id]
+        if any(row.name.lower() == user.name.lower() for row in others):
+            raise InvalidName()
+        if any(row.email.lower() == user.email.lower() for row in others):
+            raise InvalidEmail()
 
-        # Проверка срока действия токена
-        current_time = datetime.now(timezone.utc).timestamp()
+    @classmethod
+    async def _invalidate(cls, *user_ids: int, tasks: bool = False):
+        """Сбрасывает кеш ответов после закоммиченной записи пользователей.
 
-        if expire < current_time:
-            raise TokenExpired()
+        Ответы /users/user/id удаляются точечно по ID, страницы /users/ -
+        сменой поколения списка. tasks=True после удаления: ON DELETE
+        SET NULL меняет user_id у задач, какие именно - неизвестно.
+        """
 
-        return {"username": username, "id": user_id}
+        await response_cache.invalidate(
+            USER_ID, *({"user_id": user_id} for user_id in user_ids)
+        )
+        await response_cache.invalidate_all(USER_LIST)
+        if tasks:
+            await response_cache.invalidate_all(TASK_LIST, TASK_TITLE)
 
-    except jwt.ExpiredSignatureError:
-        raise TokenExpired()
-    except jwt.exceptions:
-        raise UserNotAutorized()
+    @classmethod
+    async def _revoke_user_tokens(cls, db: AsyncSession, user_id: int):
+        """Отзывает все access-токены удаленного пользователя.
 
+        Не только токен запроса: get_current_user отклоняет любой токен
+        с этим id. Refresh-токены удаляет ON DELETE CASCADE.
+        """
 
-class UserService(UserRepository):
+        await revocation_list.revoke_user(db, user_id)
 
     @classmethod
     async def get_user_id(cls, db: AsyncSession, user_id):
@@ -128,6 +131,39 @@ class UserService(UserRepository):
             raise NotFoundUser()
         return value
 
+    @classmethod
+    async def get_batch(cls, db: AsyncSession, batch: BatchUsers):
+        """Получает пользователей по спискам ID, имен и почт.
+
+        Поиски идут через DataLoader запроса: повторы схлопываются, а на
+        каждый вид ключа уходит один запрос WHERE ... = ANY(:keys).
+        Ответ повторяет порядок запроса; ненайденные ключи - null,
+        хеш пароля в ответ не попадает.
+        """
+
+        def public(user):
+            if user is None:
+                return None
+            return {
+                "id": user.id,
+                "name": user.name,
+                "email": user.email,
+                "version": user.version,
+            }
+
+        ids, names, emails = await asyncio.gather(
+            asyncio.gather(*(cls.get_by_id(db, key) for key in batch.ids)),
+            asyncio.gather(*(cls.get_by_name(db, key) for key in batch.names)),
+            asyncio.gather(
+                *(cls.get_by_email(db, key) for key in batch.emails)
+            ),
+        )
+        return {
+            "ids": [public(user) for user in ids],
+            "names": [public(user) for user in names],
+            "emails": [public(user) for user in emails],
+        }
+
     @classmethod
     async def update(
         cls,
@@ -135,43 +171,85 @@ class UserService(UserRepository):
         user_id,
         update_user: CreateUser,
         get_user: Annotated[dict, Depends(get_current_user)],
+        version: int | None = None,
     ):
-        """Метод для обновления информации о пользователе с проверкой на валидности данных"""
+        """Метод для обновления пользователя с проверкой валидности данных.
+
+        Занятость имени и почты, существование пользователя и его версия
+        проверяются одним запросом по уникальным индексам еще до bcrypt;
+        гонку между проверкой и записью ловят ограничение UNIQUE и
+        условие version в UPDATE.
 
-        lists_id = await db.scalars(select(User))
-        lists_id = [[row.id, row.name, row.email] for row in lists_id.all()]
-        lists_all = [
-            [x[0] for x in lists_id],
-            [x[1] for x in lists_id],
-            [x[2] for x in lists_id],
-        ]
+        Args:
+            version (int | None): Ожидаемая версия из If-Match
+                (None - обновлять без проверки версии)
+
+        Returns:
+            dict: status, message и обновленный пользователь (user)
+        """
 
         if user_id != get_user.get("id"):
             raise DeleteUser()
 
-        elif user_id not in lists_all[0]:
-            raise NotFoundUser()
-
-        elif not (data.is_valid_username(update_user.name)) or (
-            update_user.name.capitalize() in lists_all[1]
-        ):
+        elif not (data.is_valid_username(update_user.name)):
             raise InvalidName()
 
-        elif not (data.is_valid_email(update_user.email)) or (
-            update_user.email.capitalize() in lists_all[2]
-        ):
+        elif not (data.is_valid_email(update_user.email)):
             raise InvalidEmail()
 
         elif not (data.is_valid_password(update_user.password)):
             raise InvalidPasswd()
 
-        else:
-            await UserRepository.update_user(db, user_id, update_user)
+        taken = await UserRepository.find_taken(
+            db, update_user.name, update_user.email, user_id
+        )
+        cls._check_taken(taken, update_user, user_id, version)
+
+        try:
+            updated = await UserRepository.update_user(
+                db, user_id, update_user, version
+            )
+        except IntegrityError as error:
+            await db.rollback()
+            raise integrity_exception(error, USER_ERRORS, InvalidName)
+
+        if updated is None:
+            # Строку изменили или удалили между проверкой и UPDATE
+            if version is not None:
+                raise PreconditionFailed()
+            raise NotFoundUser()
+        await cls._invalidate(user_id)
+        return {
+            "status": status.HTTP_200_OK,
+            "message": "User succesfull updated!",
+            "user": updated,
+        }
+
+    @classmethod
+    async def _finish_delete(cls, db: AsyncSession, deleted_id, condition):
+        """Завершает удаление: коммит или разбор, почему не удалилось.
+
+        DELETE уже проверил и ключ, и владельца; лишний запрос EXISTS
+        делается только при неудаче, чтобы отличить чужого
+        пользователя от несуществующего.
+        """
+
+        if deleted_id is None:
+            if await UserRepository.exists_where(db, condition):
+                raise DeleteUser()
             return {
-                "status": status.HTTP_200_OK,
-                "message": "User succesfull updated!",
+                "status_code": status.HTTP_404_NOT_FOUND,
+                "transaction": "User not found",
             }
 
+        await cls._revoke_user_tokens(db, deleted_id)
+        await db.commit()
+        await cls._invalidate(deleted_id, tasks=True)
+        return {
+            "status_code": status.HTTP_200_OK,
+            "transaction": "User delete is successful",
+        }
+
     @classmethod
     async def del_by_id(
         cls,
@@ -181,24 +259,10 @@ class UserService(UserRepository):
     ):
         """Метод для удаления пользователя через его ID"""
 
-        value = await UserRepository.delete_user_id(db, user_id)
-
-        if value is None:
-            return {
-                "status_code": status.HTTP_404_NOT_FOUND,
-                "transaction": "User not found",
-            }
-
-        if get_user.get("id") == value.id:
-            value = await UserRepository.delete_user_id(db, user_id)
-            await db.delete(value)
-            await db.commit()
-            return {
-                "status_code": status.HTTP_200_OK,
-                "transaction": "User delete is successful",
-            }
-        else:
-            raise DeleteUser()
+        deleted_id = await UserRepository.delete_user_id(
+            db, user_id, get_user.get("id")
+        )
+        return await cls._finish_delete(db, deleted_id, User.id == user_id)
 
     @classmethod
     async def del_by_name(
@@ -209,24 +273,12 @@ class UserService(UserRepository):
     ):
         """Метод для удаления пользователя через его имя"""
 
-        value = await UserRepository.delete_user_name(db, name)
-
-        if value is None:
-            return {
-                "status_code": status.HTTP_404_NOT_FOUND,
-                "transaction": "User not found",
-            }
-
-        if get_user.get("id") == value.id:
-            value = await UserRepository.delete_user_name(db, name)
-            await db.delete(value)
-            await db.commit()
-            return {
-                "status_code": status.HTTP_200_OK,
-                "transaction": "User delete is successful",
-            }
-        else:
-            raise DeleteUser()
+        deleted_id = await UserRepository.delete_user_name(
+            db, name, get_user.get("id")
+        )
+        return await cls._finish_delete(
+            db, deleted_id, UserRepository.name_is(name)
+        )
 
     @classmethod
     async def del_by_email(
@@ -237,57 +289,121 @@ class UserService(UserRepository):
     ):
         """Метод для удаления пользователя через его почту"""
 
-        value = await UserRepository.delete_user_email(db, email)
+        deleted_id = await UserRepository.delete_user_email(
+            db, email, get_user.get("id")
+        )
+        return await cls._finish_delete(
+            db, deleted_id, UserRepository.email_is(email)
+        )
 
-        if value is None:
-            return {
-                "status_code": status.HTTP_404_NOT_FOUND,
-                "transaction": "User not found",
-            }
+    @classmethod
+    async def create_bulk(cls, db: AsyncSession, users: list[CreateUser]):
+        """Создает пачку пользователей с построчной валидацией.
 
-        if get_user.get("id") == value.id:
-            value = await UserRepository.delete_user_email(db, email)
-            await db.delete(value)
-            await db.commit()
-            return {
-                "status_code": status.HTTP_200_OK,
-                "transaction": "User delete is successful",
-            }
-        else:
-            raise DeleteUser()
+        Занятость имен и почт проверяется одним запросом на всю пачку,
+        пароли прошедших проверку строк хешируются параллельно, запись
+        идет одним INSERT в одной транзакции. Строки с ошибками
+        пропускаются и попадают в errors с индексом.
 
-    @classmethod
-    async def create_new_user(cls, db: AsyncSession, create_user: CreateUser):
-        """Метод для создания пользователя со всеми проверками данных"""
+        Returns:
+            dict: status_code, created - число созданных пользователей,
+                errors - ошибки по строкам (index, status_code, detail)
+        """
 
-        try:
-            lists = await db.scalars(select(User))
-            lists = [
-                [row.name.capitalize(), row.email.capitalize()]
-                for row in lists.all()
-            ]
-            lists_name_email = [
-                [row[0] for row in lists],
-                [row[1] for row in lists],
-            ]
-            if (
-                not (data.is_valid_username(create_user.name))
-                or create_user.name.capitalize() in lists_name_email[0]
+        result = BulkResult()
+        names, emails = set(), set()
+        candidates = []
+        for index, user in enumerate(users):
+            if not (data.is_valid_username(user.name)) or (
+                user.name.lower() in names
             ):
-                raise InvalidName()
-            elif (
-                not (data.is_valid_email(create_user.email))
-                or create_user.email.capitalize() in lists_name_email[1]
+                result.reject(index, InvalidName())
+            elif not (data.is_valid_email(user.email)) or (
+                user.email.lower() in emails
             ):
-                raise InvalidEmail()
-            elif not (data.is_valid_password(create_user.password)):
-                raise InvalidPasswd()
+                result.reject(index, InvalidEmail())
+            elif not (data.is_valid_password(user.password)):
+                result.reject(index, InvalidPasswd())
+            else:
+                names.add(user.name.lower())
+                emails.add(user.email.lower())
+                candidates.append(index)
+
+        taken_names, taken_emails = await UserRepository.taken_names_emails(
+            db, names, emails
+        )
+        rows = []
+        for index in candidates:
+            if users[index].name.lower() in taken_names:
+                result.reject(index, InvalidName())
+            elif users[index].email.lower() in taken_emails:
+                result.reject(index, InvalidEmail())
             else:
-                await UserRepository.create_user(db, create_user)
-                return {
-                    "status_code": status.HTTP_201_CREATED,
-                    "transaction": "Successful",
-                }
+                rows.append(index)
+
+        if rows:
+            hashed = await password_service.hash_many(
+                [users[index].password for index in rows]
+            )
+            created = await UserRepository.create_users(
+                db, [users[index] for index in rows], hashed
+            )
+            result.created = len(created)
+            skipped = [
+                index
+                for index in rows
+                if (users[index].name.lower(), users[index].email.lower())
+                not in created
+            ]
+            if skipped:
+                # ON CONFLICT DO NOTHING не говорит, какой ключ занят
+                taken_names, taken_emails = (
+                    await UserRepository.taken_names_emails(
+                        db,
+                        {users[index].name.lower() for index in skipped},
+                        {users[index].email.lower() for index in skipped},
+                    )
+                )
+                for index in skipped:
+                    if users[index].name.lower() in taken_names:
+                        result.reject(index, InvalidName())
+                    elif users[index].email.lower() in taken_emails:
+                        result.reject(index, InvalidEmail())
+                    else:
+                        # Конфликтующую строку уже удалили: что было
+                        # занято, не узнать, строку можно повторить
+                        result.reject(index, BulkConflict())
+            await cls._invalidate()
+        return result.report()
+
+    @classmethod
+    async def create_new_user(cls, db: AsyncSession, create_user: CreateUser):
+        """Метод для создания пользователя со всеми проверками данных.
+
+        Проверка занятости делается до хеширования пароля, чтобы не
+        тратить bcrypt на заведомо отклоненный запрос.
+        """
 
-        except IntegrityError:
+        if not (data.is_valid_username(create_user.name)):
+            raise InvalidName()
+        elif not (data.is_valid_email(create_user.email)):
             raise InvalidEmail()
+        elif not (data.is_valid_password(create_user.password)):
+            raise InvalidPasswd()
+
+        taken = await UserRepository.find_taken(
+            db, create_user.name, create_user.email
+        )
+        cls._check_taken(taken, create_user)
+
+        try:
+            await UserRepository.create_user(db, create_user)
+        except IntegrityError as error:
+            await db.rollback()
+            raise integrity_exception(error, USER_ERRORS, InvalidEmail)
+
+        await cls._invalidate()
+        return {
+            "status_code": status.HTTP_201_CREATED,
+            "transaction": "Successful",
+        }
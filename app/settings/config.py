@@ -14,5 +14,90 @@ class Settings:
     database_password = os.getenv("DATABASE_PASSWORD")
     database_name = os.getenv("DATABASE_NAME")
 
+    # Пул соединений и кеш prepared statements asyncpg
+    database_pool_size = int(os.getenv("DATABASE_POOL_SIZE", 5))
+    database_max_overflow = int(os.getenv("DATABASE_MAX_OVERFLOW", 10))
+    database_pool_timeout = float(os.getenv("DATABASE_POOL_TIMEOUT", 30))
+    database_pool_recycle = int(os.getenv("DATABASE_POOL_RECYCLE", -1))
+    database_pool_pre_ping = (
+        os.getenv("DATABASE_POOL_PRE_PING", "false").lower() == "true"
+    )
+    database_statement_cache_size = int(
+        os.getenv("DATABASE_STATEMENT_CACHE_SIZE", 100)
+    )
+    # Реплики только для чтения: "host:port,host:port"
+    database_replica_hosts = [
+        host.strip()
+        for host in os.getenv("DATABASE_REPLICA_HOSTS", "").split(",")
+        if host.strip()
+    ]
+    # На сколько секунд исключать недоступную реплику из ротации
+    database_replica_retry_seconds = float(
+        os.getenv("DATABASE_REPLICA_RETRY_SECONDS", 30)
+    )
+    # Сколько секунд после записи клиент читает с primary
+    read_your_writes_seconds = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+    # Совместимость с pgbouncer в режиме transaction pooling
+    database_pgbouncer = (
+        os.getenv("DATABASE_PGBOUNCER", "false").lower() == "true"
+    )
+
     secret_key = os.getenv("SECRET_KEY")
     algorithm = os.getenv("ALGORITHM")
+    access_token_expire_minutes = int(
+        os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 20)
+    )
+    refresh_token_expire_days = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+    # Keyset-пагинация списков
+    page_default_limit = int(os.getenv("PAGE_DEFAULT_LIMIT", 50))
+    page_max_limit = int(os.getenv("PAGE_MAX_LIMIT", 500))
+    # Нечеткий поиск пользователей: размер выдачи по умолчанию и максимум
+    user_search_default_limit = int(os.getenv("USER_SEARCH_DEFAULT_LIMIT", 20))
+    user_search_max_limit = int(os.getenv("USER_SEARCH_MAX_LIMIT", 50))
+    # Максимум ключей каждого вида в пакетном поиске
+    # (/users/batch, /tasks/batch)
+    batch_max_keys = int(os.getenv("BATCH_MAX_KEYS", 500))
+    # Максимум строк в одном запросе массового создания
+    bulk_max_rows = int(os.getenv("BULK_MAX_ROWS", 1000))
+    # Сколько строк читать и отдавать за раз при выгрузке NDJSON
+    export_chunk_rows = int(os.getenv("EXPORT_CHUNK_ROWS", 1000))
+    # Логирование SQL: порог медленного запроса и число повторов для N+1
+    sql_slow_query_ms = float(os.getenv("SQL_SLOW_QUERY_MS", 200))
+    sql_n_plus_one_threshold = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+    # Фильтр Блума для отозванных токенов: емкость и период догрузки
+    revocation_bloom_capacity = int(
+        os.getenv("REVOCATION_BLOOM_CAPACITY", 100000)
+    )
+    revocation_refresh_seconds = float(
+        os.getenv("REVOCATION_REFRESH_SECONDS", 5)
+    )
+    # Перекрытие догрузки: записи, закоммиченные позже более новых
+    # (revoked_at - время начала транзакции), не теряются
+    revocation_overlap_seconds = float(
+        os.getenv("REVOCATION_OVERLAP_SECONDS", 60)
+    )
+    # Ограничение попыток логина (token bucket): "memory" или "redis"
+    rate_limit_backend = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    rate_limit_redis_url = os.getenv(
+        "RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0"
+    )
+    login_rate_per_minute_user = float(
+        os.getenv("LOGIN_RATE_PER_MINUTE_USER", 5)
+    )
+    login_burst_user = int(os.getenv("LOGIN_BURST_USER", 10))
+    login_rate_per_minute_ip = float(os.getenv("LOGIN_RATE_PER_MINUTE_IP", 30))
+    login_burst_ip = int(os.getenv("LOGIN_BURST_IP", 60))
+    # Кеш ответов горячих GET-эндпоинтов: "memory" или "redis"
+    cache_backend = os.getenv("CACHE_BACKEND", "memory")
+    cache_redis_url = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/1")
+    cache_ttl_seconds = float(os.getenv("CACHE_TTL_SECONDS", 30))
+    cache_max_entries = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+    # Сколько уже проверенных JWT-токенов держать в памяти
+    token_cache_size = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+
+    # Пул для хеширования паролей: "thread" или "process"
+    password_hash_executor = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+    password_hash_workers = int(
+        os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)
+    )
+    password_hash_max_queue = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
@@ -0,0 +1,153 @@
+"""Бенчмарк UserRepository.get_free_users: старый цикл против NOT EXISTS.
+
+Запуск (нужен доступный Postgres из app/settings/.env):
+
+    python -m app.test.bench_free_users --users 100000 --tasks 1000000
+
+Данные создаются во временных таблицах "user" и "task" текущего
+соединения (pg_temp перекрывает public), поэтому рабочие таблицы
+не затрагиваются. Старая реализация масштабируется как O(U x T)
+плюс один SELECT на каждого свободного пользователя, поэтому на
+полном объеме она гоняется на выборке --legacy-users, а результат
+экстраполируется.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import engine
+from app.backend.pagination import PageParams
+from app.models.task import Task
+from app.models.user import User
+from app.pattern_repository.UserRepository import UserRepository
+
+
+async def legacy_get_free_users(db: AsyncSession):
+    """Реализация get_free_users до перехода на anti-join"""
+
+    lists_user_id = await db.scalars(select(User))
+    lists_user_id = [row.id for row in lists_user_id.all()]
+    lists_tasks_user_id = await db.scalars(select(Task))
+    lists_tasks_user_id = [row.user_id for row in lists_tasks_user_id]
+    free_users = []
+    for index in lists_user_id:
+        if index not in lists_tasks_user_id:
+            user = await db.scalar(select(User).where(User.id == int(index)))
+            free_users.append(user)
+    return free_users
+
+
+async def seed(db: AsyncSession, users: int, tasks: int, with_index: bool):
+    """Заполняет временные таблицы: задачи раздаются случайным
+    пользователям, 10% задач без владельца"""
+
+    await db.execute(text('DROP TABLE IF EXISTS pg_temp."task"'))
+    await db.execute(text('DROP TABLE IF EXISTS pg_temp."user"'))
+    await db.execute(
+        text('CREATE TEMP TABLE "user" (LIKE public."user" INCLUDING ALL)')
+    )
+    await db.execute(
+        text('CREATE TEMP TABLE "task" (LIKE public."task" INCLUDING ALL)')
+    )
+    if not with_index:
+        # LIKE ... INCLUDING ALL дает копиям индексов свои имена
+        # (task_user_id_idx), поэтому ищем их по определению
+        names = await db.scalars(
+            text(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE schemaname = ("
+                "SELECT nspname FROM pg_namespace "
+                "WHERE oid = pg_my_temp_schema()) "
+                "AND tablename = 'task' AND indexdef LIKE '%(user_id)'"
+            )
+        )
+        for name in names.all():
+            await db.execute(text(f'DROP INDEX pg_temp."{name}"'))
+    await db.execute(
+        text(
+            'INSERT INTO "user" (id, name, email, hashed_password) '
+            "SELECT g, 'User' || g, 'User' || g || '@mail.com', 'x' "
+            "FROM generate_series(1, :users) g"
+        ),
+        {"users": users},
+    )
+    await db.execute(
+        text(
+            'INSERT INTO "task" (id, title, description, status, user_id) '
+            "SELECT g, 'Task' || g, 'description', 'new', "
+            "CASE WHEN random() < 0.1 THEN NULL "
+            "ELSE 1 + floor(random() * :users)::int END "
+            "FROM generate_series(1, :tasks) g"
+        ),
+        {"users": users, "tasks": tasks},
+    )
+    await db.execute(text('ANALYZE "user"'))
+    await db.execute(text('ANALYZE "task"'))
+
+
+async def timed(coroutine) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = await coroutine
+    return time.perf_counter() - start, result
+
+
+async def walk_all_pages(db: AsyncSession, limit: int) -> int:
+    """Проходит всех свободных пользователей постранично"""
+
+    total = 0
+    page = PageParams(limit=limit)
+    while True:
+        result = await UserRepository.get_free_users(db, page)
+        total += len(result["items"])
+        if result["next_cursor"] is None:
+            return total
+        page = PageParams(limit=limit, after={"id": result["items"][-1].id})
+
+
+async def main(args):
+    async with engine.connect() as connection:
+        db = AsyncSession(bind=connection)
+
+        sample_tasks = args.tasks * args.legacy_users // args.users
+        await seed(db, args.legacy_users, sample_tasks, args.index)
+        legacy_seconds, legacy = await timed(legacy_get_free_users(db))
+        scale = (args.users / args.legacy_users) * (args.tasks / sample_tasks)
+        print(
+            f"legacy  {args.legacy_users} users / {sample_tasks} tasks: "
+            f"{legacy_seconds:.3f}s, {len(legacy)} free users; "
+            f"~{legacy_seconds * scale:.0f}s extrapolated to "
+            f"{args.users} / {args.tasks} (O(U x T))"
+        )
+        db.expunge_all()
+
+        await seed(db, args.users, args.tasks, args.index)
+        first_seconds, first = await timed(
+            UserRepository.get_free_users(db, PageParams(limit=args.limit))
+        )
+        print(
+            f"anti-join first page ({args.limit}) "
+            f"{args.users} users / {args.tasks} tasks: {first_seconds:.4f}s"
+        )
+        all_seconds, count = await timed(walk_all_pages(db, args.limit))
+        print(f"anti-join all pages: {all_seconds:.3f}s, {count} free users")
+
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--legacy-users", type=int, default=2_000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument(
+        "--no-index",
+        dest="index",
+        action="store_false",
+        help="без индекса по task.user_id, чтобы увидеть его вклад",
+    )
+    asyncio.run(main(parser.parse_args()))
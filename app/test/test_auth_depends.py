@@ -0,0 +1,139 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from app.backend import auth_depends
+from app.backend.auth_depends import (
+    ALGORITHM,
+    SECRET_KEY,
+    TokenCache,
+    get_current_user,
+    token_cache,
+)
+from app.backend.revocation import BloomFilter, RevocationList
+from app.exceptions.exceptions import (
+    TokenExpired,
+    TokenRevoked,
+    UserNotAutorized,
+)
+
+
+def make_token(exp_delta: int = 60, **claims) -> str:
+    payload = {"sub": "frensski", "id": 1, "exp": int(time.time()) + exp_delta}
+    payload.update(claims)
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def test_cache_is_bounded_lru():
+    cache = TokenCache(max_size=2)
+    cache.set("a", int(time.time()) + 60, {"id": 1})
+    cache.set("b", int(time.time()) + 60, {"id": 2})
+    assert cache.get("a") == {"id": 1}
+    cache.set("c", int(time.time()) + 60, {"id": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"id": 1}
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_cache_entry_expires_with_token():
+    cache = TokenCache(max_size=2)
+    cache.set("a", int(time.time()) - 1, {"id": 1})
+
+    assert cache.get("a") is None
+    assert cache.metrics()["size"] == 0
+
+
+async def test_get_current_user_uses_cache():
+    token_cache.clear()
+    token = make_token()
+    hits = token_cache.hits
+
+    first = await get_current_user(token)
+    second = await get_current_user(token)
+
+    assert first == second
+    assert first["username"] == "frensski" and first["id"] == 1
+    assert token_cache.hits == hits + 1
+
+
+async def test_get_current_user_rejects_bad_tokens():
+    with pytest.raises(TokenExpired):
+        await get_current_user(make_token(exp_delta=-60))
+    with pytest.raises(UserNotAutorized):
+        await get_current_user(make_token() + "x")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    revoked = [f"jti-{index}" for index in range(1000)]
+    for jti in revoked:
+        bloom.add(jti)
+
+    assert all(jti in bloom for jti in revoked)
+    false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+
+async def test_revocation_rebuild_swaps_filter_in_one_step():
+    class Result(list):
+        def all(self):
+            return self
+
+    class Row:
+        def __init__(self, jti, revoked_at):
+            self.jti, self.revoked_at = jti, revoked_at
+
+    now = datetime.now(timezone.utc)
+    rows = [Row(f"jti-{index}", now) for index in range(1, 6)]
+
+    class Session:
+        async def execute(self, query):
+            # Во время загрузки старый фильтр еще действует
+            assert "old" in revocations.bloom
+            return Result(rows)
+
+        async def commit(self):
+            pass
+
+    revocations = RevocationList(capacity=2, refresh_seconds=60)
+    revocations.bloom.add("old")
+    await revocations._rebuild(Session())
+
+    assert all(row.jti in revocations.bloom for row in rows)
+    assert revocations.bloom.capacity >= 2 * len(rows)
+    assert revocations.bloom.count < revocations.bloom.capacity
+
+
+def test_revocation_refresh_overlap_is_idempotent():
+    revocations = RevocationList(refresh_seconds=60, overlap_seconds=60)
+    now = datetime.now(timezone.utc)
+    revocations._remember("late", now - timedelta(seconds=30))
+    revocations._remember("new", now)
+    revocations._remember("local", now)
+    # Следующая догрузка снова читает окно перекрытия
+    revocations._remember("new", now)
+    revocations._remember("local", now)
+    revocations._forget_old()
+
+    assert revocations.bloom.count == 3
+    assert revocations._last_seen == now
+    assert {"late", "new", "local"} <= set(revocations._recent)
+
+    revocations._remember("later", now + timedelta(seconds=120))
+    revocations._forget_old()
+    assert set(revocations._recent) == {"later"}
+
+
+async def test_deleted_user_tokens_are_rejected(monkeypatch):
+    revocations = RevocationList(refresh_seconds=3600)
+    revocations._loaded_at = time.monotonic()
+    revocations.bloom.add(revocations.user_marker(7))
+    revocations._confirmed.add(revocations.user_marker(7))
+    monkeypatch.setattr(auth_depends, "revocation_list", revocations)
+
+    with pytest.raises(TokenRevoked):
+        await get_current_user(make_token(id=7))
+    assert (await get_current_user(make_token(id=8)))["id"] == 8
@@ -0,0 +1,93 @@
+import pytest
+
+from app.backend.cache import MemoryCache, ResponseCache
+
+
+async def test_read_through_hit_and_precise_invalidation():
+    cache = ResponseCache(MemoryCache())
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return {"id": 1, "title": "Report"}
+
+    first = await cache.cached("task.title", {"title": "report"}, load)
+    second = await cache.cached("task.title", {"title": "report"}, load)
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.body == first.body == b'{"id":1,"title":"Report"}'
+    assert len(calls) == 1
+
+    await cache.invalidate("task.title", {"title": "report"})
+    await cache.cached("task.title", {"title": "report"}, load)
+    assert len(calls) == 2
+
+
+async def test_invalidate_all_and_errors_not_cached():
+    cache = ResponseCache(MemoryCache())
+
+    async def fail():
+        raise LookupError
+
+    with pytest.raises(LookupError):
+        await cache.cached("task.list", {"limit": 1}, fail)
+    key = cache.key("task.list", 0, {"limit": 1})
+    assert await cache.backend.get(key) is None
+
+    async def load():
+        return [1]
+
+    await cache.cached("task.list", {"limit": 1}, load)
+    await cache.invalidate_all("task.list")
+    response = await cache.cached("task.list", {"limit": 1}, load)
+    assert response.headers["X-Cache"] == "MISS"
+
+
+async def test_memory_cache_ttl_and_lru():
+    backend = MemoryCache(max_entries=2)
+    await backend.set("a", b"1", ttl=60)
+    await backend.set("b", b"2", ttl=60)
+    await backend.get("a")
+    await backend.set("c", b"3", ttl=60)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1"
+    assert backend.evictions == 1
+
+    await backend.set("d", b"4", ttl=0)
+    assert await backend.get("d") is None
+
+
+async def test_entry_of_other_version_is_a_miss():
+    cache = ResponseCache(MemoryCache())
+
+    async def load():
+        return 1, {"changes": 1}
+
+    await cache.cached("user.list", {}, load, version=1)
+    hit = await cache.cached("user.list", {}, load, version=1)
+    newer = await cache.cached("user.list", {}, load, version=2)
+
+    assert hit.headers["X-Cache"] == "HIT"
+    assert newer.headers["X-Cache"] == "MISS"
+
+
+async def test_etag_follows_version_read_with_rows():
+    cache = ResponseCache(MemoryCache())
+
+    async def lagging():
+        # реплика отстает: строки и счетчик прочитаны на версии 1
+        return 1, {"changes": 1}
+
+    response = await cache.cached(
+        "user.list",
+        {},
+        lagging,
+        version=2,
+        etag=lambda version: f'W/"user-{version}"',
+    )
+    again = await cache.cached("user.list", {}, lagging, version=2)
+
+    assert response.headers["ETag"] == 'W/"user-1"'
+    assert again.headers["X-Cache"] == "MISS"
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.backend.dataloader import clear_loaders, get_loader
+
+
+class Session:
+    def __init__(self):
+        self.info = {}
+
+
+async def test_loads_in_one_batch_and_dedupes_keys():
+    calls = []
+
+    async def batch(keys):
+        calls.append(keys)
+        return {key: key * 10 for key in keys if key != 3}
+
+    loader = get_loader(Session(), "user.id", batch)
+    values = await loader.load_many([1, 2, 1, 3])
+
+    assert values == [10, 20, 10, None]
+    assert calls == [[1, 2, 3]]
+    assert await loader.load(2) == 20
+    assert len(calls) == 1
+
+
+async def test_loader_is_per_session_and_name():
+    async def batch(keys):
+        return {}
+
+    session = Session()
+    loader = get_loader(session, "a", batch)
+
+    assert get_loader(session, "a", batch) is loader
+    assert get_loader(session, "b", batch) is not loader
+    assert get_loader(Session(), "a", batch) is not loader
+
+
+async def test_failed_batch_is_not_cached():
+    attempts = []
+
+    async def batch(keys):
+        attempts.append(keys)
+        if len(attempts) == 1:
+            raise RuntimeError("db down")
+        return {key: key for key in keys}
+
+    loader = get_loader(Session(), "task.id", batch)
+    with pytest.raises(RuntimeError):
+        await asyncio.gather(loader.load(1), loader.load(2))
+
+    assert await loader.load(1) == 1
+    assert attempts == [[1, 2], [1]]
+
+
+async def test_clear_loaders_drops_cached_rows():
+    rows = {1: "old"}
+
+    async def batch(keys):
+        return {key: rows.get(key) for key in keys}
+
+    session = Session()
+    assert await get_loader(session, "task.id", batch).load(1) == "old"
+
+    rows[1] = "new"
+    clear_loaders(session)
+
+    assert await get_loader(session, "task.id", batch).load(1) == "new"
@@ -0,0 +1,32 @@
+from fastapi import Response
+
+from app.backend.etag import changes_etag, conditional_get, etag_matches
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = changes_etag("task", 7)
+
+    assert etag == 'W/"task-7"'
+    assert etag_matches('W/"task-7"', etag)
+    assert etag_matches('"task-7"', etag)
+    assert etag_matches('"user-3", W/"task-7"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"task-6"', etag)
+    assert not etag_matches(None, etag)
+
+
+async def test_not_modified_skips_render():
+    calls = []
+
+    async def render():
+        calls.append(1)
+        return Response(content=b"[]", media_type="application/json")
+
+    etag = changes_etag("user", 2)
+    cached = await conditional_get(etag, etag, render)
+    fresh = await conditional_get('W/"user-1"', etag, render)
+
+    assert cached.status_code == 304 and cached.body == b""
+    assert cached.headers["ETag"] == etag
+    assert fresh.status_code == 200 and fresh.headers["ETag"] == etag
+    assert len(calls) == 1
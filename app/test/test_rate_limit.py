@@ -0,0 +1,54 @@
+import pytest
+
+from app.backend.rate_limit import LoginRateLimiter, MemoryBackend
+from app.exceptions.exceptions import TooManyRequests
+
+
+async def test_memory_backend_allows_burst_then_rejects():
+    backend = MemoryBackend(shards=4)
+
+    results = [await backend.take("key", rate=1, capacity=3) for _ in range(4)]
+
+    assert results[:3] == [0.0, 0.0, 0.0]
+    assert results[3] > 0
+
+
+async def test_memory_backend_evicts_old_keys():
+    backend = MemoryBackend(shards=1, max_keys=2)
+
+    for key in ("a", "b", "c"):
+        await backend.take(key, rate=1, capacity=1)
+
+    assert list(backend._buckets[0]) == ["b", "c"]
+
+
+async def test_login_limiter_is_case_insensitive_per_user(monkeypatch):
+    from app.settings.config import Settings
+
+    monkeypatch.setattr(Settings, "login_burst_user", 2)
+    limiter = LoginRateLimiter(MemoryBackend())
+
+    await limiter.check("Frensski", "10.0.0.1")
+    await limiter.check("frensski", "10.0.0.2")
+    with pytest.raises(TooManyRequests) as error:
+        await limiter.check("FRENSSKI", "10.0.0.3")
+
+    assert error.value.status_code == 429
+    assert "Retry-After" in error.value.headers
+    assert limiter.metrics()["rejected"] == 1
+
+
+async def test_flood_from_one_ip_does_not_lock_out_the_user(monkeypatch):
+    from app.settings.config import Settings
+
+    monkeypatch.setattr(Settings, "login_burst_ip", 2)
+    monkeypatch.setattr(Settings, "login_burst_user", 3)
+    limiter = LoginRateLimiter(MemoryBackend())
+
+    await limiter.check("frensski", "10.0.0.66")
+    await limiter.check("frensski", "10.0.0.66")
+    for _ in range(5):
+        with pytest.raises(TooManyRequests):
+            await limiter.check("frensski", "10.0.0.66")
+
+    await limiter.check("frensski", "10.0.0.1")
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.backend.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def query():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1, 2]
+
+    values = await asyncio.gather(*(flight.do("key", query) for _ in range(5)))
+
+    assert values == [[1, 2]] * 5
+    assert len(calls) == 1
+    assert flight.metrics()["coalesced"] == 4
+    assert flight.metrics()["in_flight"] == 0
+
+    await flight.do("key", query)
+    assert len(calls) == 2
+
+
+async def test_error_reaches_all_waiters_and_is_not_kept():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise LookupError
+
+    results = await asyncio.gather(
+        flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+    )
+    assert all(isinstance(result, LookupError) for result in results)
+    with pytest.raises(LookupError):
+        await flight.do("key", fail)
+    assert flight.metrics()["executed"] == 2
+
+
+async def test_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("key", query))
+    second = asyncio.ensure_future(flight.do("key", query))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
@@ -0,0 +1,55 @@
+import io
+
+import pytest
+
+from app.tools.transfer import batches, detect_format, read_records
+
+
+def test_read_csv_converts_types_and_empty_to_null():
+    file = io.StringIO(
+        "id,title,description,status,user_id\n"
+        "1,First task,desc,new,7\n"
+        "2,Second task,desc,active,\n"
+    )
+
+    columns, records = read_records("task", file, "csv")
+
+    assert columns == ["id", "title", "description", "status", "user_id"]
+    assert list(records) == [
+        (1, "First task", "desc", "new", 7),
+        (2, "Second task", "desc", "active", None),
+    ]
+
+
+def test_read_jsonl_uses_columns_of_first_line():
+    file = io.StringIO(
+        '{"name": "Alice", "email": "a@mail.com", "hashed_password": "x"}\n'
+        "\n"
+        '{"name": "Bobby", "email": "b@mail.com"}\n'
+    )
+
+    columns, records = read_records("user", file, "jsonl")
+
+    assert columns == ["name", "email", "hashed_password"]
+    assert list(records) == [
+        ("Alice", "a@mail.com", "x"),
+        ("Bobby", "b@mail.com", None),
+    ]
+
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError):
+        read_records("task", io.StringIO("id,owner\n1,2\n"), "csv")
+
+
+def test_empty_file_is_rejected():
+    for fmt in ("csv", "jsonl"):
+        with pytest.raises(ValueError, match="empty input file"):
+            read_records("task", io.StringIO(""), fmt)
+
+
+def test_batches_and_format_detection():
+    assert list(batches(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert detect_format("tasks.JSONL", None) == "jsonl"
+    with pytest.raises(ValueError):
+        detect_format("tasks.xml", None)
@@ -0,0 +1,64 @@
+"""Импорт и выгрузка таблиц task и user в обход HTTP.
+
+    python -m app.tools export task tasks.csv
+    python -m app.tools export user users.jsonl --batch-size 10000
+    python -m app.tools import task tasks.csv
+
+Формат берется из расширения файла (csv или jsonl) или из --format;
+"-" вместо пути означает stdin/stdout. Прогресс пишется в stderr.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.tools.transfer import (
+    FORMATS,
+    TABLES,
+    detect_format,
+    export_table,
+    import_table,
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools",
+        description=__doc__.splitlines()[0],
+    )
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("path", help='файл или "-" для stdin/stdout')
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="строк на один COPY при импорте и на prefetch при выгрузке",
+    )
+    args = parser.parse_args(argv)
+    if args.path == "-" and args.format is None:
+        parser.error("--format is required with stdin/stdout")
+    return args
+
+
+async def main(args) -> int:
+    fmt = detect_format(args.path, args.format)
+    if args.action == "import":
+        if args.path == "-":
+            return await import_table(
+                args.table, sys.stdin, fmt, args.batch_size
+            )
+        with open(args.path, newline="", encoding="utf-8") as file:
+            return await import_table(args.table, file, fmt, args.batch_size)
+
+    if args.path == "-":
+        return await export_table(
+            args.table, sys.stdout.buffer, fmt, args.batch_size
+        )
+    with open(args.path, "wb") as file:
+        return await export_table(args.table, file, fmt, args.batch_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,231 @@
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime
+from typing import IO, Iterator
+
+from app.backend.db import async_session_maker
+from app.models.task import Task
+from app.models.user import User
+
+TABLES = {"task": Task, "user": User}
+FORMATS = ("csv", "jsonl")
+
+
+class Progress:
+    """Прогресс выгрузки/загрузки в stderr не чаще раза в секунду"""
+
+    def __init__(self, action: str, table: str, unit: str = "rows"):
+        self.action = action
+        self.table = table
+        self.unit = unit
+        self.count = 0
+        self.started = time.monotonic()
+        self._printed = 0.0
+
+    def add(self, count: int):
+        self.count += count
+        now = time.monotonic()
+        if now - self._printed >= 1:
+            self._printed = now
+            self._print("\r")
+
+    def done(self):
+        self._print("\r")
+        sys.stderr.write("\n")
+
+    def _print(self, prefix: str):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        sys.stderr.write(
+            f"{prefix}{self.action} {self.table}: {self.count} {self.unit} "
+            f"in {elapsed:.1f}s ({self.count / elapsed:.0f} {self.unit}/s)"
+        )
+        sys.stderr.flush()
+
+
+def stored_columns(model) -> list:
+    """Колонки таблицы без вычисляемых БД: их нельзя загрузить через COPY"""
+
+    return [
+        column for column in model.__table__.columns if column.computed is None
+    ]
+
+
+def detect_format(path: str, fmt: str | None) -> str:
+    """Формат из аргумента или из расширения файла"""
+
+    fmt = fmt or path.rsplit(".", 1)[-1].lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+    return fmt
+
+
+def _to_bool(value) -> bool:
+    return str(value).lower() in ("true", "t", "1")
+
+
+def column_converters(table: str, columns: list[str]) -> list:
+    """Преобразователи значений из файла в типы колонок таблицы.
+
+    COPY в бинарном формате требует точных типов Python, а CSV отдает
+    только строки; пустая строка в CSV означает NULL.
+    """
+
+    table_columns = {
+        column.name: column for column in stored_columns(TABLES[table])
+    }
+    unknown = [name for name in columns if name not in table_columns]
+    if unknown:
+        raise ValueError(f"unknown columns for {table}: {unknown}")
+
+    converters = []
+    for name in columns:
+        python_type = table_columns[name].type.python_type
+        if python_type is datetime:
+            convert = datetime.fromisoformat
+        elif python_type is bool:
+            convert = _to_bool
+        else:
+            convert = python_type
+        converters.append(convert)
+    return converters
+
+
+def read_records(
+    table: str, file: IO[str], fmt: str
+) -> tuple[list[str], Iterator[tuple]]:
+    """Колонки файла и генератор записей, готовых для COPY"""
+
+    if fmt == "csv":
+        reader = csv.reader(file)
+        columns = _first(reader)
+        rows = iter(reader)
+    else:
+        lines = (line for line in file if line.strip())
+        first = json.loads(_first(lines))
+        columns = list(first)
+        rows = (
+            [row.get(name) for name in columns]
+            for row in _chain_first(first, lines)
+        )
+
+    converters = column_converters(table, columns)
+
+    def records():
+        for row in rows:
+            yield tuple(
+                None if value is None or value == "" else convert(value)
+                for convert, value in zip(converters, row)
+            )
+
+    return columns, records()
+
+
+def _first(items: Iterator):
+    """Первый элемент файла (заголовок CSV или первая строка JSONL)"""
+
+    try:
+        return next(items)
+    except StopIteration:
+        raise ValueError("empty input file") from None
+
+
+def _chain_first(first: dict, lines) -> Iterator[dict]:
+    yield first
+    for line in lines:
+        yield json.loads(line)
+
+
+def batches(records: Iterator[tuple], size: int) -> Iterator[list[tuple]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _driver_connection(session):
+    """asyncpg-соединение под сессией SQLAlchemy"""
+
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    return raw.driver_connection
+
+
+async def import_table(
+    table: str, file: IO[str], fmt: str, batch_size: int
+) -> int:
+    """Загружает файл в таблицу через COPY пачками по batch_size строк.
+
+    Вся загрузка идет в одной транзакции: при ошибке (например,
+    нарушении уникальности) в таблицу не попадает ничего. Если в файле
+    есть id, последовательность id сдвигается за максимальный.
+    """
+
+    columns, records = read_records(table, file, fmt)
+    progress = Progress("import", table)
+    async with async_session_maker() as session:
+        driver = await _driver_connection(session)
+        async with driver.transaction():
+            for batch in batches(records, batch_size):
+                await driver.copy_records_to_table(
+                    table, records=batch, columns=columns
+                )
+                progress.add(len(batch))
+            if "id" in columns:
+                await driver.execute(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table}\"', "
+                    f"'id'), (SELECT max(id) FROM \"{table}\"))"
+                )
+            # ETag списков строятся по счетчику изменений таблицы
+            await driver.execute(
+                "INSERT INTO change_counter (table_name, counter) "
+                "VALUES ($1, 1) ON CONFLICT (table_name) "
+                "DO UPDATE SET counter = change_counter.counter + 1",
+                table,
+            )
+    progress.done()
+    return progress.count
+
+
+async def export_table(
+    table: str, file: IO[bytes], fmt: str, batch_size: int
+) -> int:
+    """Выгружает таблицу в файл в порядке id.
+
+    CSV пишется напрямую из COPY TO STDOUT, JSONL - через серверный
+    курсор с prefetch=batch_size; память не зависит от размера таблицы.
+    """
+
+    columns = [column.name for column in stored_columns(TABLES[table])]
+    query = f'SELECT {", ".join(columns)} FROM "{table}" ORDER BY id'
+    async with async_session_maker() as session:
+        driver = await _driver_connection(session)
+        if fmt == "csv":
+            progress = Progress("export", table, unit="bytes")
+
+            async def write(chunk: bytes):
+                file.write(chunk)
+                progress.add(len(chunk))
+
+            await driver.copy_from_query(
+                query, output=write, format="csv", header=True
+            )
+        else:
+            progress = Progress("export", table)
+            async with driver.transaction():
+                buffer = io.StringIO()
+                async for record in driver.cursor(query, prefetch=batch_size):
+                    buffer.write(json.dumps(dict(record), default=str) + "\n")
+                    progress.add(1)
+                    if progress.count % batch_size == 0:
+                        file.write(buffer.getvalue().encode())
+                        buffer = io.StringIO()
+                file.write(buffer.getvalue().encode())
+    progress.done()
+    return progress.count